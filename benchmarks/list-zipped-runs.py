@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmark for listing runs with zipped meta.
+
+Generates zipped run meta for a number of runs and times listing them
+along with the attributes shown by `gage list`. Zipped meta is
+generated without meta records and the run index is disabled so that
+each attribute is read from the meta zip.
+
+Listing is timed with the meta zip cache disabled, with a cold cache,
+and with a warm cache. Warm listing reuses cached zip files only when
+the cache is large enough to hold all runs - use `--cache-size` to
+change the cache size (this may require a higher open file limit).
+
+Usage:
+
+    python benchmarks/list-zipped-runs.py [--runs N] [--cache-size N]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+import zipfile
+
+os.environ["NO_RUN_INDEX"] = "1"
+
+from gage._internal import run_meta
+from gage._internal import var
+
+from gage._internal.run_attr import run_attr
+from gage._internal.run_attr import run_config
+from gage._internal.run_attr import run_label
+from gage._internal.run_attr import run_status
+from gage._internal.run_attr import run_summary
+
+
+def main():
+    args = _parse_args()
+    with tempfile.TemporaryDirectory() as runs_dir:
+        print(f"Generating {args.runs} zipped runs in {runs_dir}")
+        _generate_runs(runs_dir, args.runs)
+        _time_list("no cache", runs_dir, "0")
+        run_meta.clear_meta_zip_cache()
+        cache_size = str(args.cache_size) if args.cache_size else None
+        _time_list("cold cache", runs_dir, cache_size)
+        _time_list("warm cache", runs_dir, cache_size)
+        run_meta.clear_meta_zip_cache()
+
+
+def _parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--runs", type=int, default=10000, help="Number of runs.")
+    p.add_argument("--cache-size", type=int, help="Meta zip cache size.")
+    return p.parse_args()
+
+
+def _generate_runs(runs_dir: str, count: int):
+    timestamp = int(time.time() * 1000000)
+    for i in range(count):
+        run_id = str(uuid.uuid4())
+        filename = os.path.join(runs_dir, f"{run_id}.meta.zip")
+        with zipfile.ZipFile(filename, "w") as zf:
+            zf.writestr("opref", "2 bench op")
+            zf.writestr("id", run_id)
+            zf.writestr("config.json", json.dumps({"i": i}))
+            zf.writestr("summary.json", json.dumps({"metrics": {"x": i}}))
+            zf.writestr("initialized", str(timestamp + i))
+            zf.writestr("staged", str(timestamp + i + 1))
+            zf.writestr("started", str(timestamp + i + 2))
+            zf.writestr("stopped", str(timestamp + i + 3))
+            zf.writestr("proc/exit", "0")
+
+
+def _time_list(desc: str, runs_dir: str, cache_size: str | None):
+    if cache_size is None:
+        os.environ.pop("GAGE_META_ZIP_CACHE", None)
+    else:
+        os.environ["GAGE_META_ZIP_CACHE"] = cache_size
+    t0 = time.perf_counter()
+    runs = var.list_runs(runs_dir, sort=["-timestamp"])
+    for run in runs:
+        run_status(run)
+        run_attr(run, "started", None)
+        run_attr(run, "stopped", None)
+        run_label(run)
+        run_config(run)
+        run_summary(run)
+    elapsed = time.perf_counter() - t0
+    print(f"{desc}: {elapsed:.3f}s ({elapsed / len(runs) * 1000000:.0f} us/run)")
+
+
+if __name__ == "__main__":
+    main()
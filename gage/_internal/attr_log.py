@@ -4,18 +4,22 @@ from typing import *
 
 from .types import *
 
+import bisect
 import json
 import os
 import shutil
 import stat
 import threading
 import time
+import uuid
 
 import ulid
 
 __all__ = [
     "LogEntry",
+    "SNAPSHOT_NAME",
     "UNKNOWN_AUTHOR",
+    "compact_attrs",
     "get_attrs",
     "get_attrs_by_author",
     "log_attrs",
@@ -26,6 +30,17 @@ __all__ = [
 
 UNKNOWN_AUTHOR = "__unknown__"
 
+SNAPSHOT_NAME = "__snapshot__.json"
+
+# A snapshot is the result of applying log entries up to and including
+# a last entry. Snapshots are created by `compact_attrs()`. Log entries
+# are not deleted when compacted so that logs can be merged. Readers
+# apply entries after the last entry to the snapshot.
+#
+# A snapshot records the number of entries it includes. If the number
+# of entries up to the last entry differs (e.g. older entries were
+# merged from another log) the snapshot is ignored.
+
 
 class LogEntry(NamedTuple):
     author: str
@@ -33,17 +48,54 @@ class LogEntry(NamedTuple):
     delete: list[str]
 
 
+class _Snapshot(NamedTuple):
+    last: str
+    count: int
+    attrs: dict[str, Any]
+    attrs_by_author: dict[str, dict[str, Any]]
+
+
 def get_attrs(src_dir: str):
-    attrs: dict[str, Any] = {}
-    for log_entry in _iter_log_entries(src_dir):
+    snapshot, names = _snapshot_and_log_names(src_dir)
+    attrs: dict[str, Any] = dict(snapshot.attrs) if snapshot else {}
+    for log_entry in _iter_log_entries(src_dir, names):
         _apply_log_entry(log_entry, attrs)
     return attrs
 
 
-def _iter_log_entries(src_dir: str):
-    for name in sorted(os.listdir(src_dir)):
-        if not name.endswith(".json"):
-            continue
+def _snapshot_and_log_names(src_dir: str) -> tuple[_Snapshot | None, list[str]]:
+    dir_names = os.listdir(src_dir)
+    names = sorted(
+        [name for name in dir_names if name.endswith(".json") and name != SNAPSHOT_NAME]
+    )
+    if SNAPSHOT_NAME not in dir_names:
+        return None, names
+    snapshot = _read_snapshot(os.path.join(src_dir, SNAPSHOT_NAME))
+    if not snapshot:
+        return None, names
+    included = bisect.bisect_right(names, snapshot.last)
+    if included != snapshot.count:
+        # Log has entries that aren't in snapshot - ignore snapshot
+        return None, names
+    return snapshot, names[included:]
+
+
+def _read_snapshot(filename: str):
+    try:
+        with open(filename) as f:
+            data = json.load(f)
+        return _Snapshot(
+            data["last"],
+            data["count"],
+            data["attrs"],
+            data["attrs-by-author"],
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _iter_log_entries(src_dir: str, names: list[str]):
+    for name in names:
         filename = os.path.join(src_dir, name)
         yield _read_log_entry(filename)
 
@@ -55,8 +107,17 @@ def _apply_log_entry(log_entry: LogEntry, attrs: dict[str, Any]):
 
 
 def get_attrs_by_author(src_dir: str, author: str = ""):
-    attrs_by_author: dict[str, dict[str, Any]] = {}
-    for log_entry in _iter_log_entries(src_dir):
+    snapshot, names = _snapshot_and_log_names(src_dir)
+    attrs_by_author: dict[str, dict[str, Any]] = (
+        {
+            name: dict(attrs)
+            for name, attrs in snapshot.attrs_by_author.items()
+            if not author or name == author
+        }
+        if snapshot
+        else {}
+    )
+    for log_entry in _iter_log_entries(src_dir, names):
         if author and log_entry.author != author:
             continue
         attrs = attrs_by_author.setdefault(log_entry.author, {})
@@ -116,10 +177,54 @@ def make_log_id(timestamp_ms: int = 0):
     return str(ulid.ULID.from_timestamp(timestamp_ms).to_uuid4())
 
 
+def compact_attrs(src_dir: str):
+    """Writes a snapshot of logged attributes in src_dir.
+
+    Log entries are not modified. Returns True if a snapshot is written
+    or False if an existing snapshot is current.
+    """
+    snapshot, names = _snapshot_and_log_names(src_dir)
+    if not names:
+        return False
+    attrs = dict(snapshot.attrs) if snapshot else {}
+    attrs_by_author = (
+        {name: dict(attrs) for name, attrs in snapshot.attrs_by_author.items()}
+        if snapshot
+        else {}
+    )
+    for log_entry in _iter_log_entries(src_dir, names):
+        _apply_log_entry(log_entry, attrs)
+        _apply_log_entry(log_entry, attrs_by_author.setdefault(log_entry.author, {}))
+    count = (snapshot.count if snapshot else 0) + len(names)
+    _write_snapshot(_Snapshot(names[-1], count, attrs, attrs_by_author), src_dir)
+    return True
+
+
+def _write_snapshot(snapshot: _Snapshot, dest_dir: str):
+    data = {
+        "last": snapshot.last,
+        "count": snapshot.count,
+        "attrs": snapshot.attrs,
+        "attrs-by-author": snapshot.attrs_by_author,
+    }
+    filename = os.path.join(dest_dir, SNAPSHOT_NAME)
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_filename, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
 def merge_attrs(src_dir: str, dest_dir: str):
-    """Never-replace, non-recursive file copy from src to dest."""
+    """Never-replace, non-recursive file copy from src to dest.
+
+    Snapshots are not copied.
+    """
     for name in os.listdir(src_dir):
-        if not name.endswith(".json"):
+        if not name.endswith(".json") or name == SNAPSHOT_NAME:
             continue
         dest_filename = os.path.join(dest_dir, name)
         if os.path.exists(dest_filename):
@@ -0,0 +1,260 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from .cache_util import delete_cache_db
+from .cache_util import is_racy
+from .cache_util import open_cache_db
+
+__all__ = [
+    "BOARD_CACHE_NAME",
+    "BoardCacheReader",
+    "cached_board_fields",
+    "delete_board_cache",
+]
+
+log = logging.getLogger(__name__)
+
+BOARD_CACHE_NAME = ".board-cache.db"
+
+BOARD_CACHE_SCHEMA = 2
+
+# The board cache stores board fields for finalized runs (i.e. runs
+# with zipped meta) in a runs directory. Fields for a run are reused as
+# long as the run meta zip and the run user attributes are unchanged.
+# Fields for runs with racy changes (see `cache_util.is_racy()`) are
+# always recomputed.
+
+_CREATE_FIELDS = """
+CREATE TABLE IF NOT EXISTS fields (
+    name TEXT PRIMARY KEY,
+    meta_sig TEXT NOT NULL,
+    user_sig INTEGER NOT NULL,
+    field_names TEXT NOT NULL,
+    fields TEXT NOT NULL
+)
+"""
+
+BoardFields = dict[str, Any]
+
+_CacheCol = Literal["fields", "field_names"]
+
+
+def cached_board_fields(
+    runs: list[Run], board_fields: Callable[[Run], BoardFields]
+) -> list[BoardFields]:
+    """Returns board fields for a list of runs.
+
+    `board_fields` is a function that returns board fields for a run.
+    Field values must be JSON compatible.
+
+    Board fields for finalized runs are cached in the applicable runs
+    directory. `board_fields` is called only for runs that are not
+    cached or that have changed since they were cached.
+
+    The cache is not used if `NO_BOARD_CACHE` is set to "1".
+    """
+    with BoardCacheReader(runs, board_fields) as reader:
+        return list(reader.fields())
+
+
+class BoardCacheReader:
+    """Reads board fields and field names for a list of runs.
+
+    The board cache for each runs directory is synchronized once, when
+    the reader is created, using a single connection per directory.
+    Fields for runs that are not cached are generated at most once per
+    reader, which lets a caller read field names and then fields
+    without regenerating fields for uncached runs.
+
+    Use as a context manager or call `close()` when done.
+    """
+
+    def __init__(self, runs: list[Run], board_fields: Callable[[Run], BoardFields]):
+        self._runs = runs
+        self._board_fields = board_fields
+        self._dbs: list[sqlite3.Connection] = []
+        self._cached: dict[int, tuple[sqlite3.Connection, str]] = {}
+        self._generated: dict[int, BoardFields] = {}
+        if os.getenv("NO_BOARD_CACHE") != "1":
+            for root, indexed_runs in _runs_by_root(runs).items():
+                self._sync_root(root, indexed_runs)
+
+    def _sync_root(self, root: str, runs: list[tuple[int, Run]]):
+        path = os.path.join(root, BOARD_CACHE_NAME)
+        try:
+            db = open_cache_db(path, BOARD_CACHE_SCHEMA, ["fields"], [_CREATE_FIELDS])
+        except sqlite3.Error as e:
+            log.debug("Cannot use board cache %s: %s", path, e)
+            return
+        try:
+            with db:
+                cached = _sync_cache(db, root, runs, self._board_fields)
+        except sqlite3.Error as e:
+            log.debug("Error updating board cache %s: %s", path, e)
+            db.close()
+            return
+        self._dbs.append(db)
+        for i, val in cached:
+            if isinstance(val, str):
+                self._cached[i] = (db, val)
+            else:
+                self._generated[i] = val
+
+    def field_names(self) -> Iterator[list[str]]:
+        """Generates field names for each run."""
+        for i, run in enumerate(self._runs):
+            val = self._read_cached(i, "field_names")
+            if val is None:
+                fields = self._generated.get(i)
+                if fields is None:
+                    fields = self._generated[i] = self._board_fields(run)
+                val = list(fields)
+            yield val
+
+    def fields(self) -> Iterator[BoardFields]:
+        """Generates fields for each run."""
+        for i, run in enumerate(self._runs):
+            val = self._read_cached(i, "fields")
+            if val is None:
+                val = self._generated.pop(i, None)
+                if val is None:
+                    val = self._board_fields(run)
+            yield val
+
+    def _read_cached(self, i: int, col: _CacheCol):
+        try:
+            db, name = self._cached[i]
+        except KeyError:
+            return None
+        try:
+            row = db.execute(
+                f"SELECT {col} FROM fields WHERE name = ?", (name,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.debug("Error reading board cache for %s: %s", name, e)
+            return None
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        for db in self._dbs:
+            db.close()
+        self._dbs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc: Any):
+        self.close()
+
+
+def delete_board_cache(root: str):
+    """Deletes the board cache in `root`."""
+    delete_cache_db(root, BOARD_CACHE_NAME)
+
+
+def _runs_by_root(runs: list[Run]):
+    # Group finalized runs by runs dir - other runs aren't cached
+    roots: dict[str, list[tuple[int, Run]]] = {}
+    for i, run in enumerate(runs):
+        if run.meta_dir.endswith(".meta.zip"):
+            roots.setdefault(os.path.dirname(run.meta_dir), []).append((i, run))
+    return roots
+
+
+def _sync_cache(
+    db: sqlite3.Connection,
+    root: str,
+    runs: list[tuple[int, Run]],
+    board_fields: Callable[[Run], BoardFields],
+) -> list[tuple[int, str | BoardFields]]:
+    """Updates the cache for runs in root.
+
+    Returns a list of run index and either the cache row name, for runs
+    that are cached, or generated fields for runs that can't be cached.
+    """
+    rows = {
+        name: (meta_sig, user_sig)
+        for name, meta_sig, user_sig in db.execute(
+            "SELECT name, meta_sig, user_sig FROM fields"
+        )
+    }
+    _delete_stale_rows(db, root, rows)
+    now = time.time_ns()
+    updates: list[tuple[str, str, int, str, str]] = []
+    vals: list[tuple[int, str | BoardFields]] = []
+    for i, run in runs:
+        name = os.path.basename(run.meta_dir)
+        meta_sig = _meta_sig(run)
+        user_sig = _user_sig(run)
+        if meta_sig is None:
+            continue
+        if rows.get(name) == (meta_sig, user_sig):
+            vals.append((i, name))
+            continue
+        fields = board_fields(run)
+        if _is_trusted_sig(meta_sig, user_sig, now):
+            updates.append(
+                (name, meta_sig, user_sig, json.dumps(list(fields)), json.dumps(fields))
+            )
+            vals.append((i, name))
+        else:
+            vals.append((i, fields))
+    if updates:
+        log.debug("Updating %i run(s) in board cache for %s", len(updates), root)
+        db.executemany(
+            "INSERT OR REPLACE INTO fields "
+            "(name, meta_sig, user_sig, field_names, fields) "
+            "VALUES (?, ?, ?, ?, ?)",
+            updates,
+        )
+    return vals
+
+
+def _delete_stale_rows(db: sqlite3.Connection, root: str, rows: dict[str, Any]):
+    try:
+        names = set(os.listdir(root))
+    except OSError:
+        return
+    stale = [(name,) for name in rows if name not in names]
+    if stale:
+        db.executemany("DELETE FROM fields WHERE name = ?", stale)
+
+
+def _meta_sig(run: Run):
+    """Returns a signature for a run meta zip.
+
+    The signature is the modified time of the zip in nanoseconds and the
+    zip size. Returns None if the zip cannot be read.
+    """
+    try:
+        st = os.stat(run.meta_dir)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+
+def _user_sig(run: Run):
+    """Returns a signature for a run user attributes.
+
+    The signature is 0 if the run doesn't have user attributes,
+    otherwise it's the modified time of the run user directory in
+    nanoseconds.
+    """
+    try:
+        return os.stat(run.meta_dir[:-9] + ".user").st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _is_trusted_sig(meta_sig: str, user_sig: int, now: int):
+    meta_mtime = int(meta_sig.split(":")[0])
+    return not is_racy(meta_mtime, now) and not is_racy(user_sig, now)
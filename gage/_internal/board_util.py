@@ -10,6 +10,9 @@ import operator
 
 from functools import cmp_to_key
 
+from .board_cache import BoardCacheReader
+from .board_cache import cached_board_fields
+
 from .run_attr import *
 
 from .summary_util import format_summary_value
@@ -19,7 +22,10 @@ log = logging.getLogger(__name__)
 
 __all__ = [
     "BoardConfigError",
+    "BoardStream",
     "board_data",
+    "board_stream",
+    "cell_formatter",
     "column_label",
     "filter_board_runs",
     "formatted_cell_value",
@@ -28,9 +34,22 @@ __all__ = [
 _ColDef = dict[str, Any]
 _ColDefs = list[_ColDef]
 _ExtraColAttrs = dict[str, Any]
-_Row = dict[str, Any]
 _RowData = list[dict[str, Any]]
 
+# Marks a field that isn't defined for a run
+_MISSING = object()
+
+
+class _Columns(NamedTuple):
+    """Board field values by field name.
+
+    Each field has a list of values, one for each run in board order.
+    Fields that aren't defined for a run are `_MISSING`.
+    """
+
+    size: int
+    fields: dict[str, list[Any]]
+
 
 def filter_board_runs(runs: list[Run], board: BoardDef):
     run_select = board.get_run_select()
@@ -67,31 +86,87 @@ def _maybe_apply_status_filter(
 
 
 def board_data(board: BoardDef, runs: list[Run]) -> dict[str, Any]:
-    inferred_col_defs, raw_row_data = _board_raw_data(runs)
-    col_defs = _board_col_defs(board, inferred_col_defs)
-    row_data = _prune_row_data_fields(_filter_by_group(raw_row_data, board), col_defs)
+    columns = _board_columns(runs)
+    col_defs = _board_col_defs(board, _inferred_col_defs(columns))
+    selected = _filter_by_group(columns, board)
     return {
         **_board_meta(board),
         "colDefs": col_defs,
-        "rowData": row_data,
+        "rowData": _row_data(columns, selected, col_defs),
     }
 
 
-def _board_raw_data(runs: list[Run]):
-    field_cols = {}
-    row_data: _RowData = [
-        {
-            **_run_attr_fields(run, field_cols),
-            **_config_fields(run, field_cols),
-            **_summary_fields(run, field_cols),
-        }
-        for run, summary in [(run, run_summary(run)) for run in runs]
-    ]
-    col_defs = _sorted_field_cols(field_cols)
-    return col_defs, row_data
+class BoardStream(NamedTuple):
+    meta: dict[str, Any]
+    col_defs: _ColDefs
+    rows: Iterator[dict[str, Any]]
+
+
+def board_stream(board: BoardDef, runs: list[Run]) -> BoardStream:
+    """Returns board data with rows that are generated as runs are read.
+
+    Column defs are generated before rows are read. If the board doesn't
+    define columns, column defs are inferred from field names, which are
+    read from the board cache where possible. The board cache is
+    synchronized once for both column defs and rows.
+
+    Boards that use group select read all runs before generating rows.
+    """
+    meta = _board_meta(board)
+    if board.get_group_select():
+        data = board_data(board, runs)
+        return BoardStream(meta, data["colDefs"], iter(data["rowData"]))
+    reader = BoardCacheReader(runs, _run_fields)
+    try:
+        inferred_col_defs = [] if board.get_columns() else _stream_col_defs(reader)
+        col_defs = _board_col_defs(board, inferred_col_defs)
+    except Exception:
+        reader.close()
+        raise
+    return BoardStream(meta, col_defs, _stream_rows(reader, col_defs))
+
+
+def _stream_col_defs(reader: BoardCacheReader) -> _ColDefs:
+    field_names: dict[str, None] = {}
+    for names in reader.field_names():
+        field_names.update(dict.fromkeys(names))
+    return [{"field": name} for name in sorted(field_names, key=_field_sort_key)]
+
+
+def _stream_rows(reader: BoardCacheReader, col_defs: _ColDefs):
+    field_names = _row_field_names(col_defs)
+    with reader:
+        for fields in reader.fields():
+            yield {name: fields[name] for name in field_names if name in fields}
+
+
+def _board_columns(runs: list[Run]):
+    fields: dict[str, list[Any]] = {}
+    size = len(runs)
+    for i, run_fields in enumerate(cached_board_fields(runs, _run_fields)):
+        for name, val in run_fields.items():
+            col = fields.get(name)
+            if col is None:
+                col = fields[name] = [_MISSING] * size
+            col[i] = val
+    return _Columns(size, fields)
+
 
+def _run_fields(run: Run) -> dict[str, Any]:
+    summary = run_summary(run)
+    return {
+        **_run_attr_fields(run),
+        **_gen_fields(run_config(run), "config"),
+        **_gen_fields(summary.get_attributes(), "attribute"),
+        **_gen_fields(summary.get_metrics(), "metric"),
+    }
+
+
+def _inferred_col_defs(columns: _Columns) -> _ColDefs:
+    return [{"field": name} for name in sorted(columns.fields, key=_field_sort_key)]
 
-def _run_attr_fields(run: Run, field_cols: dict[str, Any]):
+
+def _run_attr_fields(run: Run):
     fields = {
         "id": run.id,
         "name": run.name,
@@ -103,7 +178,7 @@ def _run_attr_fields(run: Run, field_cols: dict[str, Any]):
         "stopped": _run_datetime(run, "stopped"),
         "label": run_label(run),
     }
-    return _gen_fields(fields, "run", field_cols)
+    return _gen_fields(fields, "run")
 
 
 _RUN_ATTR_ORDER = {
@@ -144,20 +219,16 @@ def _run_datetime(run: Run, attr_name: str):
     return val.isoformat()
 
 
-def _gen_fields(
-    data: dict[str, Any],
-    summary_type: str,
-    field_cols: dict[str, Any],
-):
-    fields: dict[str, JSONCompatible] = {}
-    for key, val in data.items():
-        field_name = f"{summary_type}:{key}"
-        _apply_field_col(field_name, field_cols)
-        fields[field_name] = _normalize_field_val(val)
-    return fields
+def _gen_fields(data: dict[str, Any], summary_type: str):
+    return {
+        f"{summary_type}:{key}": _normalize_field_val(val) for key, val in data.items()
+    }
 
 
 def _normalize_field_val(data: Any) -> Any:
+    if data is None or isinstance(data, (str, int)):
+        # Fast path for the most common values
+        return data
     data = _safe_json_val(data)
     if isinstance(data, dict):
         try:
@@ -181,29 +252,8 @@ def _is_nan(val: Any):
     return isinstance(val, float) and val != val
 
 
-def _apply_field_col(field_name: str, col_defs: dict[str, Any]):
-    col_def = col_defs.setdefault(field_name, {})
-    col_def["field"] = field_name
-
-
-def _config_fields(run: Run, field_cols: dict[str, Any]):
-    return _gen_fields(run_config(run), "config", field_cols)
-
-
-def _summary_fields(run: Run, field_cols: dict[str, Any]):
-    summary = run_summary(run)
-    return {
-        **_gen_fields(summary.get_attributes(), "attribute", field_cols),
-        **_gen_fields(summary.get_metrics(), "metric", field_cols),
-    }
-
-
-def _sorted_field_cols(field_cols: dict[str, Any]) -> _ColDefs:
-    return [col for key, col in sorted(field_cols.items(), key=_field_col_sort_key)]
-
-
-def _field_col_sort_key(kv: tuple[str, Any]):
-    parts = kv[0].split(":", 1)
+def _field_sort_key(field_name: str):
+    parts = field_name.split(":", 1)
     match parts[0]:
         case "run":
             return (0, _run_attr_sort_key(parts[1]), parts[0])
@@ -214,7 +264,7 @@ def _field_col_sort_key(kv: tuple[str, Any]):
         case "metric":
             return (3, parts[1])
         case _:
-            assert False, kv
+            assert False, field_name
 
 
 def _run_attr_sort_key(name: str):
@@ -283,31 +333,25 @@ def _field_target(config_col: BoardDefColumn) -> tuple[str | None, _ExtraColAttr
     return None, col_attrs
 
 
-def _filter_by_group(row_data: _RowData, board: BoardDef) -> _RowData:
+def _filter_by_group(columns: _Columns, board: BoardDef) -> list[int]:
+    """Returns the indexes of rows selected by board group select."""
     group_select = board.get_group_select()
     if not group_select:
-        return row_data
-    group_key = _group_key_f(group_select)
-    select_from_group = _select_from_group_f(group_select)
-    groups = _group_row_data(row_data, group_key)
+        return list(range(columns.size))
+    group_keys = _field_values(columns, _group_by_field(group_select))
+    select_from_group = _select_from_group_f(group_select, columns)
+    groups = _group_indexes(group_keys)
     return [select_from_group(group) for group in groups]
 
 
-def _group_key_f(group_select: BoardDefGroupSelect) -> Callable[[_Row], Any]:
-    reader = _field_reader(group_select.get_group_by())
-    if not reader:
+def _group_by_field(group_select: BoardDefGroupSelect):
+    field_name = _field_name(group_select.get_group_by())
+    if not field_name:
         raise BoardConfigError(
             "group-select for board is missing group-by field: expected "
             "run-attr, attribute, metric, or config"
         )
-    return reader
-
-
-def _field_reader(field_spec: dict[str, Any]) -> Callable[[_Row], Any] | None:
-    field_name = _field_name(field_spec)
-    if not field_name:
-        return None
-    return lambda data: _field_value(field_name, data)
+    return field_name
 
 
 def _field_name(field_spec: dict[str, Any]):
@@ -327,20 +371,29 @@ def _field_name(field_spec: dict[str, Any]):
     return None
 
 
-def _field_value(field_name: str, data: Any) -> Any:
-    val = data.get(field_name)
+def _field_values(columns: _Columns, field_name: str) -> list[Any]:
+    col = columns.fields.get(field_name)
+    if col is None:
+        return [None] * columns.size
+    return [_field_value(val) for val in col]
+
+
+def _field_value(val: Any) -> Any:
+    if val is _MISSING:
+        return None
     return val.get("value") if isinstance(val, dict) else val
 
 
 def _select_from_group_f(
     group_select: BoardDefGroupSelect,
-) -> Callable[[_RowData], _Row]:
+    columns: _Columns,
+) -> Callable[[list[int]], int]:
     min = group_select.get_min()
     if min:
-        return _one_row_select_f(min, operator.lt, "min")
+        return _one_row_select_f(min, operator.lt, columns)
     max = group_select.get_max()
     if max:
-        return _one_row_select_f(max, operator.gt, "max")
+        return _one_row_select_f(max, operator.gt, columns)
     raise BoardConfigError(
         "group-select for board must specify either min or max fields"
     )
@@ -349,36 +402,31 @@ def _select_from_group_f(
 def _one_row_select_f(
     field_spec: dict[str, Any],
     cmp: Callable[[Any, Any], bool],
-    cmp_name: str,
-) -> Callable[[_RowData], _Row]:
-    field_val = _field_reader(field_spec)
-    if not field_val:
+    columns: _Columns,
+) -> Callable[[list[int]], int]:
+    field_name = _field_name(field_spec)
+    if not field_name:
         raise BoardConfigError(
             "group-select selector (min/max) for board is missing field: "
             "expected run-attr, attribute, metric, or config"
         )
-
-    def f(row_data: _RowData) -> _Row:
-        assert row_data
-        selected = None
-        selected_val = None
-        for cur in row_data:
-            cur_val = field_val(cur)
-            if selected is None or cmp(cur_val, selected_val):
-                selected = cur
-                selected_val = cur_val
-        assert selected
+    vals = _field_values(columns, field_name)
+
+    def f(group: list[int]) -> int:
+        assert group
+        selected = group[0]
+        for i in group[1:]:
+            if cmp(vals[i], vals[selected]):
+                selected = i
         return selected
 
     return f
 
 
-def _group_row_data(
-    row_data: _RowData, group_key: Callable[[_Row], Any]
-) -> list[_RowData]:
-    groups: dict[Any, _RowData] = {}
-    for data in row_data:
-        groups.setdefault(group_key(data), []).append(data)
+def _group_indexes(group_keys: list[Any]) -> list[list[int]]:
+    groups: dict[Any, list[int]] = {}
+    for i, key in enumerate(group_keys):
+        groups.setdefault(key, []).append(i)
     return [
         group for key, group in sorted(groups.items(), key=cmp_to_key(_group_item_cmp))
     ]
@@ -397,16 +445,25 @@ def _group_item_cmp(lhs: tuple[Any, Any], rhs: tuple[Any, Any]):
         return -1
 
 
-def _prune_row_data_fields(row_data: _RowData, col_defs: _ColDefs):
-    fields = set(col["field"] for col in col_defs if "field" in col)
+def _row_data(columns: _Columns, selected: list[int], col_defs: _ColDefs) -> _RowData:
+    field_names = _row_field_names(col_defs)
+    row_cols = [
+        (name, columns.fields[name]) for name in field_names if name in columns.fields
+    ]
     return [
-        # Keep row data for all col def fields and for run ID (run ID
-        # should always appear in row data)
-        {name: val for name, val in row.items() if name in fields or name == "run:id"}
-        for row in row_data
+        {name: col[i] for name, col in row_cols if col[i] is not _MISSING}
+        for i in selected
     ]
 
 
+def _row_field_names(col_defs: _ColDefs):
+    # Include row data for all col def fields and for run ID (run ID
+    # should always appear in row data)
+    return list(
+        dict.fromkeys(["run:id", *(col["field"] for col in col_defs if "field" in col)])
+    )
+
+
 def _board_meta(board: BoardDef):
     meta: dict[str, Any] = {}
     _maybe_apply_meta(board.get_title(), "title", meta)
@@ -451,17 +508,25 @@ def _default_field_label(field: str):
 
 
 def formatted_cell_value(column: BoardDefColumn, row: dict[str, Any]):
+    return cell_formatter(column)(row)
+
+
+def cell_formatter(column: BoardDefColumn) -> Callable[[dict[str, Any]], str]:
+    """Returns a function that formats a cell value for a column.
+
+    Use to format cell values for multiple rows.
+    """
     try:
         field = column["field"]
     except KeyError:
         try:
             score = column["score"]
         except KeyError:
-            return ""
+            return lambda row: ""
         else:
-            return _table_row_score(column["score"], row)
+            return _score_formatter(score)
     else:
-        return _table_row_field_value(column["field"], row.get(field))
+        return lambda row: _table_row_field_value(field, row.get(field))
 
 
 def _table_row_field_value(field: str, value: Any):
@@ -489,39 +554,52 @@ def _format_datetime(s: str | None):
     return datetime.datetime.strftime(d, "%Y-%m-%d %H:%M")
 
 
-def _table_row_score(score_config: Any, row: Any):
+def _score_formatter(score_config: Any) -> Callable[[dict[str, Any]], str]:
     try:
         average = score_config["average"]
-    except KeyError:
+    except (KeyError, TypeError):
         log.debug("Unsupported score config (expected 'average'): %s", score_config)
-        return ""
+        return lambda row: ""
     else:
-        score = _average_score(average, row)
-        return format_summary_value(score) if score is not None else ""
+        score_f = _average_score_f(average)
 
+        def f(row: dict[str, Any]):
+            score = score_f(row)
+            return format_summary_value(score) if score is not None else ""
 
-def _average_score(fields: list[str | tuple[str, float | int]], row: Any):
-    vals: list[tuple[float, float]] = []
-    for field in fields:
-        try:
-            vals.append(_num_field_val_and_weight(field, row))
-        except (KeyError, TypeError, ValueError):
-            pass
-    if not vals:
-        return None
-    total_weight = sum(weight for val, weight in vals)
-    return sum(val * weight / total_weight for val, weight in vals)
+        return f
 
 
-def _num_field_val_and_weight(
-    field: str | tuple[str, float | int], row: dict[str, Any]
-):
+def _average_score_f(fields: list[str | tuple[str, float | int]]):
+    weighted_fields = list(filter(None, map(_field_name_and_weight, fields)))
+
+    def f(row: dict[str, Any]):
+        vals: list[tuple[float, float]] = []
+        for field_name, weight in weighted_fields:
+            try:
+                vals.append((_num_field_val(field_name, row), weight))
+            except (KeyError, TypeError, ValueError):
+                pass
+        if not vals:
+            return None
+        total_weight = sum(weight for val, weight in vals)
+        return sum(val * weight / total_weight for val, weight in vals)
+
+    return f
+
+
+def _field_name_and_weight(field: str | tuple[str, float | int]):
     if isinstance(field, str):
-        field_name = field
-        weight = 1
-    else:
+        return field, 1.0
+    try:
         field_name, weight = field
+        return field_name, float(weight)
+    except (TypeError, ValueError):
+        return None
+
+
+def _num_field_val(field_name: str, row: dict[str, Any]):
     val = row[field_name]
     if isinstance(val, dict):
         val = val["value"]
-    return (float(val), float(weight))
+    return float(val)
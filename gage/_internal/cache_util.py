@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+import os
+import sqlite3
+
+__all__ = [
+    "RACY_NS",
+    "delete_cache_db",
+    "is_racy",
+    "open_cache_db",
+]
+
+# Support for sqlite caches stored in a runs directory (e.g. the run
+# index, board cache, and hash cache).
+#
+# File changes within this window of a cache update are considered
+# unreliable due to file system timestamp granularity. Cache entries
+# are not trusted for such changes.
+RACY_NS = 2_000_000_000
+
+
+def is_racy(mtime_ns: int, now: int):
+    """Returns True if a modified time is too recent to cache."""
+    return now - mtime_ns < RACY_NS
+
+
+def open_cache_db(
+    path: str,
+    schema: int,
+    tables: Sequence[str],
+    create: Sequence[str],
+) -> sqlite3.Connection:
+    """Opens a cache database.
+
+    `schema` is the cache schema version. If the database uses another
+    schema version, `tables` are dropped and `create` statements are
+    executed to recreate the schema.
+
+    Raises `sqlite3.Error` if the database cannot be opened.
+    """
+    db = sqlite3.connect(path, timeout=5.0)
+    try:
+        cur_schema = db.execute("PRAGMA user_version").fetchone()[0]
+        if cur_schema != schema:
+            with db:
+                for table in tables:
+                    db.execute(f"DROP TABLE IF EXISTS {table}")
+                for stmt in create:
+                    db.execute(stmt)
+                db.execute(f"PRAGMA user_version = {schema}")
+    except sqlite3.Error:
+        db.close()
+        raise
+    return db
+
+
+def delete_cache_db(root: str, name: str):
+    """Deletes a cache database in `root`.
+
+    Caches are recreated as needed.
+    """
+    try:
+        os.remove(os.path.join(root, name))
+    except FileNotFoundError:
+        pass
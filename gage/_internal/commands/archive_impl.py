@@ -51,8 +51,9 @@ def _handle_list(args: Args):
     table.add_column("name")
     table.add_column("runs", justify="right")
     table.add_column("last archived")
+    counts = var.container_run_counts()
     for archive in iter_archives():
-        run_count = _run_count(archive)
+        run_count = counts.get(archive.get_id(), 0)
         table.add_row(
             cli.label(archive.get_name()),
             cli.value(str(run_count)),
@@ -61,10 +62,6 @@ def _handle_list(args: Args):
     cli.out(table)
 
 
-def _run_count(archive: ArchiveDef):
-    return len(var.list_runs(container=archive.get_id()))
-
-
 def _formatted_last_archived(archive: ArchiveDef):
     last_archived = archive.get_last_archived()
     if not last_archived:
@@ -87,15 +84,17 @@ def _handle_delete(args: Args):
 
 
 def _handle_delete_empty(args: Args):
-    empty = [archive for archive in iter_archives() if _run_count(archive) == 0]
+    counts = var.container_run_counts()
+    empty = [archive for archive in iter_archives() if archive.get_id() not in counts]
     if not empty:
         cli.err("Nothing to delete")
         return
     _user_confirm_delete_empty(args, empty)
+    # Runs may be archived while waiting for confirmation
+    counts = var.container_run_counts()
     deleted = 0
     for archive in empty:
-        run_count = _run_count(archive)
-        if run_count:
+        if counts.get(archive.get_id(), 0):
             cli.err(f"archive [arg]{archive.get_name()}[/arg] contains runs - skipping")
             continue
         delete_archive(archive.get_id())
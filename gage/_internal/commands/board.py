@@ -58,6 +58,22 @@ JSONFlag = Annotated[
     ),
 ]
 
+NDJSONFlag = Annotated[
+    bool,
+    Option(
+        "--ndjson",
+        help="Show board rows as newline-delimited JSON output.",
+    ),
+]
+
+StreamFlag = Annotated[
+    bool,
+    Option(
+        "--stream",
+        help="Print rows as runs are read. Use with --csv or --json.",
+    ),
+]
+
 
 def show_board(
     runs: RunArgs = None,
@@ -66,8 +82,10 @@ def show_board(
     no_config: NoConfig = False,
     csv: CSVFlag = False,
     json: JSONFlag = False,
+    ndjson: NDJSONFlag = False,
+    stream: StreamFlag = False,
 ):
     """Show a board of run results."""
     from .board_impl import show_board, Args
 
-    show_board(Args(runs or [], where, config, no_config, csv, json))
+    show_board(Args(runs or [], where, config, no_config, csv, json, ndjson, stream))
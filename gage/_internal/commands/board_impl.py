@@ -30,12 +30,17 @@ class Args(NamedTuple):
     no_config: bool
     csv: bool
     json: bool
+    ndjson: bool = False
+    stream: bool = False
 
 
 def show_board(args: Args):
     _check_args(args)
     board = _load_board_def(args)
     runs = _board_runs(board, args)
+    if args.stream or args.ndjson:
+        _stream_board(board, runs, args)
+        return
     data = _board_data(board, runs)
     if args.json:
         _print_json(data)
@@ -48,6 +53,11 @@ def show_board(args: Args):
 def _check_args(args: Args):
     if args.json and args.csv:
         cli.exit_with_error("You can't use both --json and --csv options.")
+    if args.ndjson and (args.json or args.csv):
+        opt = "--json" if args.json else "--csv"
+        cli.exit_with_error(f"You can't use both {opt} and --ndjson options.")
+    if args.stream and not (args.json or args.csv or args.ndjson):
+        cli.exit_with_error("--stream requires --json, --csv, or --ndjson.")
     if args.no_config and args.config:
         cli.exit_with_error("You can't use both --config and --no-config options.")
 
@@ -100,22 +110,87 @@ def _board_data(board: BoardDef, runs: list[Run]):
         cli.exit_with_error(f"invalid board config: {e}")
 
 
+def _stream_board(board: BoardDef, runs: list[Run], args: Args):
+    log.info("Streaming board data for %i run(s)", len(runs))
+    try:
+        stream = board_stream(board, runs)
+    except BoardConfigError as e:
+        cli.exit_with_error(f"invalid board config: {e}")
+    if args.json:
+        _stream_json(stream)
+    elif args.csv:
+        _stream_csv(stream)
+    else:
+        assert args.ndjson
+        _stream_ndjson(stream)
+
+
+def _stream_json(stream: BoardStream):
+    # Output is the same as `_print_json()` for the same board data
+    out = sys.stdout
+    items = sorted(
+        [*stream.meta.items(), ("colDefs", stream.col_defs), ("rowData", None)],
+        key=lambda item: item[0],
+    )
+    out.write("{")
+    for i, (key, val) in enumerate(items):
+        out.write(f"{',' if i else ''}\n  {json.dumps(key)}: ")
+        if key == "rowData":
+            _stream_json_rows(stream.rows)
+        else:
+            out.write(_indented_json(val, 1))
+    out.write("\n}")
+
+
+def _stream_json_rows(rows: Iterator[dict[str, Any]]):
+    out = sys.stdout
+    sep = "[\n    "
+    for row in rows:
+        out.write(sep + _indented_json(row, 2))
+        sep = ",\n    "
+    out.write("[]" if sep[0] == "[" else "\n  ]")
+
+
+def _indented_json(val: Any, level: int):
+    return json.dumps(val, indent=2, sort_keys=True).replace("\n", "\n" + "  " * level)
+
+
+def _stream_csv(stream: BoardStream):
+    fields = _csv_fields(stream.col_defs)
+    writer = csv.DictWriter(sys.stdout, fields)
+    writer.writerow(_csv_headers(fields, stream.col_defs))
+    for row in stream.rows:
+        writer.writerow(_csv_row_values(row, fields))
+
+
+def _stream_ndjson(stream: BoardStream):
+    for row in stream.rows:
+        sys.stdout.write(json.dumps(row, sort_keys=True) + "\n")
+
+
 def _print_json(data: dict[str, Any]):
     sys.stdout.write(json.dumps(data, indent=2, sort_keys=True))
 
 
 def _print_csv(data: dict[str, Any]):
     col_defs = data["colDefs"]
-    fields: list[str] = [col["field"] for col in col_defs]
-    headers = {field: col.get("label") or field for field, col in zip(fields, col_defs)}
+    fields = _csv_fields(col_defs)
     buf = io.StringIO()
     writer = csv.DictWriter(buf, fields)
-    writer.writerow(headers)
+    writer.writerow(_csv_headers(fields, col_defs))
     for row in cast(list[dict[str, Any]], data["rowData"]):
         writer.writerow(_csv_row_values(row, fields))
     sys.stdout.write(buf.getvalue())
 
 
+def _csv_fields(col_defs: list[dict[str, Any]]) -> list[str]:
+    return [col["field"] for col in col_defs]
+
+
+def _csv_headers(fields: list[str], col_defs: list[dict[str, Any]]):
+    return {field: col.get("label") or field for field, col in zip(fields, col_defs)}
+
+
 def _csv_row_values(row: dict[str, Any], fields: list[str]):
     return {key: _csv_cell_value(val) for key, val in row.items() if key in fields}
 
@@ -138,6 +213,7 @@ def _print_table(data: dict[str, Any]):
     cols = data["colDefs"]
     for col in cols:
         table.add_column(column_label(col))
+    formatters = [cell_formatter(col) for col in cols]
     for row in data["rowData"]:
-        table.add_row(*[formatted_cell_value(col, row) for col in cols])
+        table.add_row(*[f(row) for f in formatters])
     cli.out(table)
@@ -33,7 +33,7 @@ Src = Annotated[
         "--src",
         "--from",
         metavar="path",
-        help="Destination of copied runs.",
+        help="Source of copied runs.",
     ),
 ]
 
@@ -107,6 +107,10 @@ def copy(
     identify a run. Multiple runs may be specified.
 
     Use '--all' to copy all runs.
+
+    When copying to a destination, Gage writes an index of copied runs
+    to the destination. When copying from a source, runs are selected
+    using the index at the source.
     """
     from .copy_impl import copy, Args
 
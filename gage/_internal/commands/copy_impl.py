@@ -4,22 +4,49 @@ from typing import *
 
 from ..types import *
 
-import json
 import logging
 import os
 import re
+import shutil
+import stat
 import subprocess
 import time
+import uuid
 
 from .. import cli
+from .. import run_meta
+from .. import var
 
+from ..board_cache import BOARD_CACHE_NAME
+from ..hash_cache import HASH_CACHE_NAME
 from ..run_attr import run_user_dir
+from ..run_config_index import CONFIG_INDEX_NAME
+from ..run_index import INDEX_NAME
+from ..run_latest import LATEST_NAME
+from ..run_latest import delete_latest_run
+from ..run_move import CONTAINER_INDEX_NAME
+from ..run_move import delete_container_index
+from ..file_util import delete_file
+from ..file_util import fast_copy_file
 from ..file_util import make_temp_dir
+from ..object_store import OBJECTS_DIR
+from ..object_store import run_manifest_digests
+from ..publish_util import PUBLISH_STATE_DIR
+from ..remote_index import REMOTE_INDEX_NAME
+from ..remote_index import RemoteIndex
+from ..remote_index import decode_remote_index
+from ..remote_index import encode_remote_index
+from ..remote_index import remote_index_runs
+from ..remote_index import update_remote_index
 from ..util import flatten
+from ..util import io_map
+from ..util import io_workers
 from ..util import which
+from ..run_util import run_for_meta_dir
 from ..var import runs_dir
 
 from .impl_support import runs_table
+from .impl_support import select_from_runs
 from .impl_support import selected_runs
 
 log = logging.getLogger(__name__)
@@ -31,6 +58,12 @@ class _CopyError(Exception):
         self.out = out
 
 
+class _CopyFile(NamedTuple):
+    path: str
+    size: int
+    digest: str | None
+
+
 class Args(NamedTuple):
     runs: list[str]
     dest: str
@@ -63,7 +96,9 @@ def copy(args: Args):
 def _copy_to(args: Args):
     runs = _selected_runs(args)
     _user_confirm_copy_to(args, runs)
-    _copy_to_([run for index, run in runs], args.dest, args.sync, args.verbose)
+    runs = [run for index, run in runs]
+    _copy_to_(runs, args.dest, args.sync, args.verbose)
+    _update_remote_index(args.dest, runs, args.sync)
 
 
 def _copy_to_(
@@ -77,20 +112,25 @@ def _copy_to_(
 ):
     pre_copy_status = cli.status("Preparing copy")
     pre_copy_status.start()
-    src_dir, includes, total_bytes = _prepare_copy(runs)
+    src_dir, files, total_bytes = _prepare_copy(runs)
     p = None  # Lazy init to avoid progress display on early error
     task = None
     nothing_copied = False
-    try:
-        for total_copied, output in _rclone_copy_to(
+    copy = (
+        _native_copy_to(src_dir, dest, files, sync, verbose)
+        if _use_native_copy(dest, config_path)
+        else _rclone_copy_to(
             src_dir,
             dest,
-            includes,
+            [f.path for f in files],
             sync,
             verbose,
             config_path,
             env,
-        ):
+        )
+    )
+    try:
+        for total_copied, output in copy:
             if total_copied == -1:
                 nothing_copied = True
                 break
@@ -120,9 +160,18 @@ def _copy_to_(
 
 
 def _prepare_copy(runs: list[Run]):
-    src_dir, includes = _src_run_includes(runs)
-    total_bytes = _rclone_size(src_dir, includes)
-    return src_dir, includes, total_bytes
+    """Returns the source dir, files, and total bytes to copy for runs.
+
+    Files for finalized runs are read from run manifests. Other run
+    files are found by listing run directories. Runs are processed in
+    parallel.
+    """
+    if not runs:
+        return make_temp_dir("gage-empty-"), [], 0
+    src_dir = os.path.dirname(runs[0].meta_dir)
+    assert all(os.path.dirname(run.meta_dir) == src_dir for run in runs), runs
+    files = [f for run_files in io_map(_run_copy_files, runs) for f in run_files]
+    return src_dir, files, sum(f.size for f in files)
 
 
 def _handle_copy_error(e: _CopyError):
@@ -160,61 +209,179 @@ def _user_confirm_copy_to(args: Args, runs: list[IndexedRun]):
         raise SystemExit(0)
 
 
-def _src_run_includes(runs: list[Run]):
-    if not runs:
-        return _empty_src_run_includes()
-    src_root = None
-    includes: list[str] = []
-    for run in runs:
-        for src in _run_sources(run):
-            src_parent, name = os.path.split(src)
-            if not src_root:
-                src_root = src_parent
-            assert src_parent == src_root, (src, src_parent)
-            if os.path.isdir(src):
-                includes.append(f"/{name}/**")
-            else:
-                includes.append(f"/{name}")
-    assert src_root
-    return src_root, includes
-
-
-def _empty_src_run_includes() -> tuple[str, list[str]]:
-    tmp = make_temp_dir("gage-empty-")
-    return tmp, []
-
-
-def _run_sources(run: Run):
+def _run_copy_files(run: Run) -> list[_CopyFile]:
+    """Returns a list of files to copy for a run.
+
+    File paths are relative to the run parent directory. Files listed in
+    the run manifest include their manifest digest.
+    """
     if not os.path.exists(run.meta_dir):
-        return
-    yield run.meta_dir
-    if os.path.exists(run.run_dir):
-        yield run.run_dir
+        return []
+    root = os.path.dirname(run.meta_dir)
+    files = _dir_or_file_copy_files(root, os.path.basename(run.meta_dir))
+    run_dir_name = os.path.basename(run.run_dir)
+    digests = run_manifest_digests(run) if run_meta.is_zip(run.meta_dir) else None
+    if digests is not None:
+        files.extend(_manifest_copy_files(root, run_dir_name, digests))
+    else:
+        files.extend(_dir_or_file_copy_files(root, run_dir_name))
     user_dir = run_user_dir(run)
-    if os.path.exists(user_dir):
-        yield user_dir
+    files.extend(_dir_or_file_copy_files(root, os.path.basename(user_dir)))
+    return files
+
+
+def _manifest_copy_files(root: str, dir_name: str, digests: dict[str, str]):
+    files: list[_CopyFile] = []
+    for path, digest in digests.items():
+        rel_path = f"{dir_name}/{path}"
+        size = _copy_file_size(os.path.join(root, rel_path))
+        if size is not None:
+            files.append(_CopyFile(rel_path, size, digest))
+    return files
+
+
+def _dir_or_file_copy_files(root: str, name: str):
+    path = os.path.join(root, name)
+    if not os.path.isdir(path):
+        size = _copy_file_size(path)
+        return [_CopyFile(name, size, None)] if size is not None else []
+    files: list[_CopyFile] = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.path.sep, "/")
+        dirnames.sort()
+        for filename in sorted(filenames):
+            size = _copy_file_size(os.path.join(dirpath, filename))
+            if size is not None:
+                files.append(_CopyFile(f"{rel_dir}/{filename}", size, None))
+    return files
+
+
+def _copy_file_size(filename: str):
+    # Symlinks are not copied
+    try:
+        st = os.lstat(filename)
+    except OSError:
+        return None
+    return None if stat.S_ISLNK(st.st_mode) else st.st_size
 
 
-def _rclone_size(src: str, includes: list[str]):
-    p = subprocess.Popen(
-        _rclone_cmd(["size", src, "--include-from", "-", "--json"]),
-        text=True,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
-    assert p.stdin
-    assert p.stdout
-    assert p.stderr
-    for include in includes:
-        p.stdin.write(include + "\n")
-    p.stdin.close()
-    result = p.wait()
-    out = p.stdout.read()
-    if result != 0:
-        err = p.stderr.read()
-        raise RuntimeError(result, err)
-    return _parse_rclone_size(out)
+# rclone remote paths start with a remote name - local paths may start
+# with a single letter drive name on Windows
+_REMOTE_P = re.compile(r"[\w.\- ]{2,}:")
+
+
+def _use_native_copy(dest: str, config_path: str | None):
+    if config_path or os.getenv("NO_NATIVE_COPY") == "1":
+        return False
+    return not _REMOTE_P.match(dest)
+
+
+def _native_copy_to(
+    src: str,
+    dest: str,
+    files: list[_CopyFile],
+    sync: bool = False,
+    verbose: int = 0,
+):
+    """Copy files to a local directory.
+
+    Yields progress in the same format as `_rclone_copy_to()`.
+
+    Files are copied in parallel. A file is skipped if a file with the
+    same size exists at the destination and, for files listed in a run
+    manifest, if the destination run manifest has the same digest for
+    the file.
+
+    If `sync` is True, files under `dest` that aren't in `files` are
+    deleted.
+    """
+    dest_digests = _dest_manifest_digests(dest, files)
+    pending = [f for f in files if not _is_current(f, dest, dest_digests)]
+    if sync:
+        for path in _delete_unlisted_files(dest, files):
+            if verbose:
+                yield None, f"{path}: Deleted"
+    if not pending:
+        yield -1, None
+        return
+    copied = sum(f.size for f in files) - sum(f.size for f in pending)
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import as_completed
+
+    with ThreadPoolExecutor(io_workers()) as executor:
+        futures = {executor.submit(_native_copy_file, src, dest, f): f for f in pending}
+        for future in as_completed(futures):
+            f = futures[future]
+            try:
+                future.result()
+            except OSError as e:
+                for future in futures:
+                    future.cancel()
+                raise _CopyError(1, f"Error copying {f.path}: {e}") from None
+            copied += f.size
+            yield copied, f"{f.path}: Copied" if verbose else None
+
+
+def _dest_manifest_digests(dest: str, files: list[_CopyFile]):
+    run_dir_names = sorted(set(f.path.split("/", 1)[0] for f in files if f.digest))
+
+    def digests(name: str):
+        run = run_for_meta_dir(os.path.join(dest, f"{name}.meta.zip"))
+        return {
+            f"{name}/{path}": digest
+            for path, digest in (
+                (run_manifest_digests(run) if run else None) or {}
+            ).items()
+        }
+
+    return {
+        path: digest
+        for run_digests in io_map(digests, run_dir_names)
+        for path, digest in run_digests.items()
+    }
+
+
+def _is_current(f: _CopyFile, dest: str, dest_digests: dict[str, str]):
+    try:
+        st = os.stat(os.path.join(dest, f.path))
+    except OSError:
+        return False
+    if st.st_size != f.size:
+        return False
+    return f.digest is None or dest_digests.get(f.path) == f.digest
+
+
+def _native_copy_file(src: str, dest: str, f: _CopyFile):
+    src_path = os.path.join(src, f.path)
+    dest_path = os.path.join(dest, f.path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # Copy to a temp file to avoid partial files at dest
+    tmp_path = f"{dest_path}.{uuid.uuid4().hex}.partial"
+    try:
+        fast_copy_file(src_path, tmp_path)
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            delete_file(tmp_path)
+
+
+def _delete_unlisted_files(dest: str, files: list[_CopyFile]):
+    keep = set(f.path for f in files)
+    deleted: list[str] = []
+    for dirpath, dirnames, filenames in os.walk(dest, topdown=False):
+        rel_dir = os.path.relpath(dirpath, dest).replace(os.path.sep, "/")
+        for name in filenames:
+            path = name if rel_dir == "." else f"{rel_dir}/{name}"
+            if path not in keep:
+                delete_file(os.path.join(dirpath, name))
+                deleted.append(path)
+        if dirpath != dest:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+    return sorted(deleted)
 
 
 def _rclone_cmd(args: list[str]):
@@ -227,24 +394,13 @@ def _rclone_cmd(args: list[str]):
     return [exe, *args]
 
 
-def _parse_rclone_size(out: str):
-    try:
-        data = json.loads(out)
-    except json.decoder.JSONDecodeError as e:
-        raise AssertionError(e, out)
-    else:
-        bytes = data.get("bytes")
-        assert isinstance(bytes, int), data
-        return bytes
-
-
 _TRANSFERRED_P = re.compile(r"([\d\.]+) ([\S]+) /")
 
 
 def _rclone_copy_to(
     src: str,
     dest: str,
-    includes: list[str],
+    files: list[str],
     sync: bool = False,
     verbose: int = 0,
     config_path: str | None = None,
@@ -252,8 +408,8 @@ def _rclone_copy_to(
 ):
     """Use rclone to copy to a location.
 
-    `includes` is a list of patterns under `src` to include. Anything is
-    skipped.
+    `files` is a list of file paths under `src` to copy. Other files
+    are skipped.
 
     Yields a tuple of bytes copied and output line. Either value may be
     None.
@@ -289,7 +445,7 @@ def _rclone_copy_to(
             rclone_cmd,
             src,
             dest,
-            "--include-from",
+            "--files-from",
             "-",
             "--progress",
             "--stats",
@@ -315,8 +471,8 @@ def _rclone_copy_to(
     )
     assert p.stdin
     assert p.stdout
-    for include in includes:
-        p.stdin.write(include + "\n")
+    for path in files:
+        p.stdin.write(path + "\n")
     p.stdin.close()
     out = []
     while True:
@@ -356,29 +512,186 @@ def _transferred_bytes_for_match(m: re.Match[str]):
         assert False, m.string
 
 
+def _update_remote_index(dest: str, runs: list[Run], sync: bool):
+    """Updates the remote index at dest with copied runs.
+
+    Entries for runs that no longer exist in a local dest are removed.
+    """
+    index = {} if sync else _read_remote_index(dest) or {}
+    if not _is_remote(dest):
+        index = {
+            run_id: entry
+            for run_id, entry in index.items()
+            if os.path.exists(os.path.join(dest, entry.get("meta") or run_id))
+        }
+    _write_remote_index(dest, encode_remote_index(update_remote_index(index, runs)))
+
+
+def _is_remote(path: str):
+    return bool(_REMOTE_P.match(path))
+
+
+def _remote_index_path(location: str):
+    if _is_remote(location) and location.endswith((":", "/")):
+        return f"{location}{REMOTE_INDEX_NAME}"
+    if _is_remote(location):
+        return f"{location}/{REMOTE_INDEX_NAME}"
+    return os.path.join(location, REMOTE_INDEX_NAME)
+
+
+def _read_remote_index(location: str) -> RemoteIndex | None:
+    """Returns the remote index at location or None if unavailable."""
+    path = _remote_index_path(location)
+    try:
+        data = _read_remote_file(path)
+    except FileNotFoundError:
+        return None
+    try:
+        return decode_remote_index(data)
+    except ValueError as e:
+        log.warning("Cannot read remote index %s: %s", path, e)
+        return None
+
+
+def _read_remote_file(path: str):
+    if not _is_remote(path):
+        with open(path, "rb") as f:
+            return f.read()
+    p = subprocess.run(_rclone_cmd(["cat", path]), capture_output=True)
+    if p.returncode != 0:
+        log.debug("Cannot read %s: %s", path, p.stderr.decode().strip())
+        raise FileNotFoundError(path)
+    return p.stdout
+
+
+def _write_remote_index(location: str, data: bytes):
+    path = _remote_index_path(location)
+    if _is_remote(path):
+        p = subprocess.run(_rclone_cmd(["rcat", path]), input=data, capture_output=True)
+        if p.returncode != 0:
+            log.warning("Error writing %s: %s", path, p.stderr.decode().strip())
+        return
+    os.makedirs(location, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            delete_file(tmp_path)
+
+
 def _copy_from(args: Args):
-    # TODO: Deferring substantial functionality of supporting remote run
-    # listings and filters. Currently only supporting a non-filterable,
-    # non-previewable copy of all remote runs.
     assert args.src
+    runs = _src_runs(args.src)
+    if runs is None:
+        _copy_all_from(args)
+        return
+    selected, from_count = select_from_runs(runs, args)
+    if not selected:
+        cli.exit_with_error("Nothing selected")
+    _user_confirm_copy_from(args, selected)
+    dest = runs_dir()
+    selected_runs = [run for index, run in selected]
+    if _is_remote(args.src):
+        _rclone_copy_runs_from(args.src, dest, selected_runs)
+    else:
+        _copy_to_(selected_runs, dest, verbose=args.verbose)
+    _reset_copied_runs_state(dest)
+
+
+def _src_runs(src: str):
+    """Returns runs available from src.
+
+    Runs are read from the remote index at src. If src doesn't have an
+    index and is a local directory, runs are listed from the directory.
+    Returns None if runs at src cannot be listed.
+    """
+    index = _read_remote_index(src)
+    if index is not None:
+        return remote_index_runs(src, index)
+    if not _is_remote(src) and os.path.isdir(src):
+        return var.list_runs(src, read_only=True)
+    return None
+
+
+def _user_confirm_copy_from(args: Args, runs: list[IndexedRun]):
+    if args.yes:
+        return
+    table = runs_table(runs)
+    cli.out(table)
+    run_count = "1 run" if len(runs) == 1 else f"{len(runs)} runs"
+    cli.err(f"You are about copy {run_count} from {args.src}")
+    cli.err()
+    if not cli.confirm(f"Continue?"):
+        raise SystemExit(0)
+
+
+def _rclone_copy_runs_from(src: str, dest: str, runs: list[Run]):
+    includes = flatten(
+        [
+            [
+                f"/{os.path.basename(run.meta_dir)}",
+                f"/{os.path.basename(run.meta_dir)}/**",
+                f"/{run.id}/**",
+                f"/{run.id}.user/**",
+            ]
+            for run in runs
+        ]
+    )
+    with cli.Progress() as p:
+        task = p.add_task("Copying runs")
+        for copied, total in _rclone_copy_from(src, dest, includes=includes):
+            p.update(task, completed=copied, total=total)
+    run_count = "1 run" if len(runs) == 1 else f"{len(runs)} runs"
+    cli.err(f"Copied {run_count}")
+
+
+def _copy_all_from(args: Args):
+    # Without a remote index, runs at src can't be listed or filtered -
+    # copy everything
     if not args.all:
-        cli.exit_with_error("'--all' is required when using '-s / --source'")
+        cli.exit_with_error(
+            f"Cannot list runs at {args.src}\n\n"
+            "Use '--all' to copy all runs from this location."
+        )
     if args.where:
-        cli.exit_with_error("'--where' cannot be used with '-s / --source'")
-    _verify_copy_from(args)
+        cli.exit_with_error(f"'--where' cannot be used to copy runs from {args.src}")
+    _verify_copy_all_from(args)
+    dest = runs_dir()
     with cli.Progress() as p:
         task = p.add_task("Copying runs")
         for copied, total in _rclone_copy_from(
-            args.src, runs_dir(), excludes=["*.project", ".deleted"]
+            args.src,
+            dest,
+            excludes=[
+                "*.project",
+                ".deleted",
+                INDEX_NAME,
+                LATEST_NAME,
+                CONTAINER_INDEX_NAME,
+                CONFIG_INDEX_NAME,
+                BOARD_CACHE_NAME,
+                HASH_CACHE_NAME,
+                REMOTE_INDEX_NAME,
+                f"/{OBJECTS_DIR}/**",
+                f"/{PUBLISH_STATE_DIR}/**",
+            ],
         ):
             p.update(task, completed=copied, total=total)
-    # TODO: Deferring even reasonable UI like "copied N runs" as we're
-    # just copying blindly from the src with the applied excludes
-    # (above)
-    cli.err(f"Copied runs")
+    _reset_copied_runs_state(dest)
+    cli.err("Copied runs")
 
 
-def _verify_copy_from(args: Args):
+def _reset_copied_runs_state(dest: str):
+    # Copied runs may be later than the latest run
+    delete_latest_run(dest)
+    # Copied move markers may change containers of existing runs
+    delete_container_index(dest)
+
+
+def _verify_copy_all_from(args: Args):
     if args.yes:
         return
     cli.err(f"You are about copy all runs from {args.src}")
@@ -390,8 +703,24 @@ def _verify_copy_from(args: Args):
 _TRANSFERRED2_P = re.compile(r"-Transferred:\s+([\d\.]+) ([\w]+) / ([\d\.]+) ([\w]+)")
 
 
-def _rclone_copy_from(src: str, dest: str, excludes: list[str]):
-    exclude_opts = flatten([["--exclude", pattern] for pattern in excludes])
+def _rclone_copy_from(
+    src: str,
+    dest: str,
+    includes: list[str] | None = None,
+    excludes: list[str] | None = None,
+):
+    """Use rclone to copy from a location.
+
+    If `includes` is specified, only matching files are copied.
+    Otherwise files matching `excludes` are skipped.
+
+    Yields a tuple of bytes copied and total bytes.
+    """
+    filter_opts = (
+        ["--include-from", "-"]
+        if includes is not None
+        else flatten([["--exclude", pattern] for pattern in excludes or []])
+    )
     cmd = _rclone_cmd(
         [
             "copy",
@@ -401,14 +730,20 @@ def _rclone_copy_from(src: str, dest: str, excludes: list[str]):
             "--stats",
             "100ms",
         ]
-        + exclude_opts
+        + filter_opts
     )
     p = subprocess.Popen(
         cmd,
         text=True,
+        stdin=subprocess.PIPE if includes is not None else None,
         stderr=subprocess.STDOUT,
         stdout=subprocess.PIPE,
     )
+    if includes is not None:
+        assert p.stdin
+        for pattern in includes:
+            p.stdin.write(pattern + "\n")
+        p.stdin.close()
     assert p.stdout
     while True:
         line = p.stdout.readline()
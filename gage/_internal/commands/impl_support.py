@@ -30,6 +30,7 @@ __all__ = [
     "one_run",
     "one_run_for_spec",
     "runs_table",
+    "select_from_runs",
     "selected_runs",
 ]
 
@@ -56,11 +57,34 @@ class SelectRunsSupport(Protocol):
 
 
 def one_run(args: OneRunSupport):
-    sorted = var.list_runs(sort=["-timestamp"], filter=_runs_filter(args))
-    selected = run_select.select_runs(sorted, [args.run or "1"])
+    if not args.run and not args.where:
+        return _latest_run(args.run)
+    if args.run and run_select.is_prefix_spec(args.run):
+        # Prefix specs don't depend on run order - skip sort
+        runs = var.list_runs(filter=_runs_filter(args))
+        return _one_selected_run(runs, args.run, args.run)
+    sorted = var.list_runs(
+        sort=["-timestamp"],
+        filter=_runs_filter(args),
+        limit=None if args.run else 1,
+    )
+    return _one_selected_run(sorted, args.run or "1", args.run)
+
+
+def one_run_for_spec(run: str):
+    if not run:
+        return _latest_run(run)
+    if run_select.is_prefix_spec(run):
+        # Prefix specs don't depend on run order - skip sort
+        return _one_selected_run(var.list_runs(), run, run)
+    return _one_selected_run(var.list_runs(sort=["-timestamp"]), run, run)
+
+
+def _one_selected_run(runs: list[Run], spec: str, user_spec: str | None):
+    selected = run_select.select_runs(runs, [spec])
     if not selected:
         cli.exit_with_error(
-            f"No runs match {args.run!r}\n\n"  # \
+            f"No runs match {user_spec!r}\n\n"  # \
             "Use '[cmd]gage list[/]' to show available runs."
         )
     if len(selected) > 1:
@@ -69,18 +93,14 @@ def one_run(args: OneRunSupport):
     return selected[0]
 
 
-def one_run_for_spec(run: str):
-    sorted = var.list_runs(sort=["-timestamp"])
-    selected = run_select.select_runs(sorted, [run or "1"])
-    if not selected:
+def _latest_run(spec: str | None):
+    run = var.latest_run()
+    if not run:
         cli.exit_with_error(
-            f"No runs match {run!r}\n\n"  # \
+            f"No runs match {spec!r}\n\n"  # \
             "Use '[cmd]gage list[/]' to show available runs."
         )
-    if len(selected) > 1:
-        assert False, "TODO: matches many runs, show list with error"
-
-    return selected[0]
+    return run
 
 
 def _runs_filter(args: OneRunSupport | SelectRunsSupport):
@@ -103,13 +123,33 @@ def selected_runs(
     args: SelectRunsSupport,
     deleted: bool = False,
     archive: str | None = None,
+    limit: int | None = None,
 ):
+    """Returns a tuple of selected runs and the number of runs selected from.
+
+    If `limit` is specified and `args` doesn't specify runs, returns at
+    most `limit` of the latest runs.
+    """
     runs = var.list_runs(
-        sort=["-timestamp"],
         filter=_runs_filter(args),
         container=(var.TRASH if deleted else archive if archive else var.ACTIVE),
+        prefetch=LISTED_RUN_ATTRS,
     )
-    return _select_runs(runs, args), len(runs)
+    sorted = var.sort_runs(runs, ["-timestamp"], None if args.runs else limit)
+    return _select_runs(sorted, args), len(runs)
+
+
+def select_from_runs(runs: list[Run], args: SelectRunsSupport):
+    """Returns a tuple of selected runs and the number of runs selected from.
+
+    Use to select from runs that aren't listed from a runs directory
+    (e.g. runs read from a remote index).
+    """
+    filter = _runs_filter(args)
+    if filter:
+        runs = [run for run in runs if filter(run)]
+    sorted = var.sort_runs(runs, ["-timestamp"])
+    return _select_runs(sorted, args), len(runs)
 
 
 def _select_runs(runs: list[Run], args: SelectRunsSupport) -> list[IndexedRun]:
@@ -246,7 +286,7 @@ def _table_row(
     index_str = str(index)
     run_name = run.name[:5]
     operation = _run_operation(run, project_namespace)
-    started = run_timestamp(run, "started")
+    started = run_attr(run, "started", None)
     started_str = human_readable.date_time(started) if started else ""
     status = _run_status(run)
     description = _run_description(run, width)
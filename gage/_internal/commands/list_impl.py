@@ -27,6 +27,7 @@ def runs_list(args: Args):
         args,
         deleted=args.deleted,
         archive=archive_for_name(args.archive).get_id() if args.archive else None,
+        limit=None if args.all else _limit(args),
     )
     limited = _limit_runs(selected, args)
     caption = _table_caption(len(limited), from_count, args)
@@ -42,8 +43,11 @@ def runs_list(args: Args):
 def _limit_runs(runs: list[tuple[int, Run]], args: Args):
     if args.all:
         return runs
-    limit = (args.more + 1) * args.limit
-    return runs[:limit]
+    return runs[: _limit(args)]
+
+
+def _limit(args: Args):
+    return (args.more + 1) * args.limit
 
 
 def _table_caption(shown_count: int, from_count: int, args: Args):
@@ -63,6 +63,14 @@ SkipRunsFlag = Annotated[
     ),
 ]
 
+FullFlag = Annotated[
+    bool,
+    Option(
+        "--full",
+        help="Publish board data and runs even if they haven't changed.",
+    ),
+]
+
 YesFlag = Annotated[
     bool,
     Option(
@@ -80,6 +88,7 @@ def publish(
     config: Config = "",
     no_config: NoConfig = False,
     skip_runs: SkipRunsFlag = False,
+    full: FullFlag = False,
     yes: YesFlag = False,
 ):
     """Publish a board."""
@@ -93,6 +102,7 @@ def publish(
             config,
             no_config,
             skip_runs,
+            full,
             yes,
         )
     )
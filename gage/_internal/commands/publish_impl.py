@@ -25,6 +25,15 @@ from .board_impl import _load_board_def
 from .board_impl import _board_runs
 from .board_impl import _board_data
 
+from ..publish_util import PublishState
+from ..publish_util import PublishPlan
+from ..publish_util import board_data_gzip
+from ..publish_util import publish_plan
+from ..publish_util import read_publish_state
+from ..publish_util import write_publish_state
+
+from ..var import runs_dir
+
 from .copy_impl import _copy_to_
 from .copy_impl import _rclone_cmd
 
@@ -41,6 +50,7 @@ class Args(NamedTuple):
     config: str
     no_config: bool
     skip_runs: bool
+    full: bool
     yes: bool
 
 
@@ -69,15 +79,53 @@ def publish(args: Args):
     runs = _board_runs(board, board_args)
     endpoint = _board_endpoint()
     _user_confirm_publish(args, board, board_id, runs, endpoint)
-    with cli.status() as status:
-        status.update("Publishing board data")
-        rclone_conf, rclone_env = _publish_board_data(board, runs, board_dest, status)
-    if not args.skip_runs:
-        _copy_runs(runs, rclone_conf, rclone_env, board_dest)
-    _delete_conf_tmp(rclone_conf)
+    plan, board_gzip = _publish_plan(args, board, board_id, runs)
+    rclone_conf, rclone_env = _rclone_conf(board_dest)
+    try:
+        with cli.status() as status:
+            if plan.publish_board:
+                status.update("Publishing board data")
+                _publish_board_data(
+                    board_gzip, rclone_conf, rclone_env, board_dest, status
+                )
+            if plan.delete_runs:
+                status.update("Deleting unpublished runs")
+                _delete_runs(
+                    plan.delete_runs, rclone_conf, rclone_env, board_dest, status
+                )
+        if plan.copy_runs:
+            # Full publish syncs runs to delete any unpublished runs
+            _copy_runs(
+                plan.copy_runs, rclone_conf, rclone_env, board_dest, sync=args.full
+            )
+        elif not args.skip_runs:
+            cli.err("Published runs are up-to-date")
+        write_publish_state(runs_dir(), board_id, plan.state)
+    finally:
+        _delete_conf_tmp(rclone_conf)
     cli.out(f"View board at {endpoint}/boards/{board_id}")
 
 
+def _publish_plan(
+    args: Args, board: BoardDef, board_id: str, runs: list[Run]
+) -> tuple[PublishPlan, bytes]:
+    state = (
+        PublishState(None, {})
+        if args.full
+        else read_publish_state(runs_dir(), board_id)
+    )
+    board_gzip, board_digest = board_data_gzip(_board_data(board, runs))
+    plan = publish_plan(state, board_digest, runs, args.skip_runs)
+    log.debug(
+        "Publish plan for %s: publish board %s, copy %i run(s), delete %i run(s)",
+        board_id,
+        plan.publish_board,
+        len(plan.copy_runs),
+        len(plan.delete_runs),
+    )
+    return plan, board_gzip
+
+
 def _board_endpoint():
     parsed = urlparse(_api_endpoint())
     return f"{parsed.scheme}://{parsed.netloc}"
@@ -197,36 +245,52 @@ no_check_bucket = true
 """
 
 
-def _publish_board_data(
-    board: BoardDef, runs: list[Run], board_dest: BoardDest, status: cli.Status
-):
-    data = _board_data(board, runs)
+def _rclone_conf(board_dest: BoardDest):
     tmp = tempfile.mkdtemp(prefix="gage-publish-")
     log.debug("Using %s for rclone config", tmp)
-    data_path = os.path.join(tmp, "data.json")
-    with open(data_path, "w") as f:
-        json.dump(data, f)
     conf_path = os.path.join(tmp, "rclone.conf")
     with open(conf_path, "w") as f:
         f.write(RCLONE_CONF.format(endpoint=board_dest.endpoint))
+    conf_env = {
+        "RCLONE_CONFIG_GAGE_ACCESS_KEY_ID": board_dest.access_key_id,
+        "RCLONE_CONFIG_GAGE_SECRET_ACCESS_KEY": board_dest.secret_access_key,
+    }
+    return conf_path, conf_env
+
+
+def _publish_board_data(
+    board_gzip: bytes,
+    conf_path: str,
+    conf_env: dict[str, str],
+    board_dest: BoardDest,
+    status: cli.Status,
+):
+    # Board data is uploaded compressed and served with gzip encoding
+    tmp = os.path.dirname(conf_path)
+    with open(os.path.join(tmp, "data.json.gz"), "wb") as f:
+        f.write(board_gzip)
     cmd = _rclone_cmd(
         [
             "--config",
             "rclone.conf",
             "copyto",
-            "data.json",
+            "data.json.gz",
             f"gage:{board_dest.bucket}/board.json",
+            "--header-upload",
+            "Content-Encoding: gzip",
+            "--header-upload",
+            "Content-Type: application/json",
         ]
     )
-    conf_env = {
-        "RCLONE_CONFIG_GAGE_ACCESS_KEY_ID": board_dest.access_key_id,
-        "RCLONE_CONFIG_GAGE_SECRET_ACCESS_KEY": board_dest.secret_access_key,
-    }
+    _run_rclone(cmd, conf_env, tmp, status)
+
+
+def _run_rclone(cmd: list[str], env: dict[str, str], cwd: str, status: cli.Status):
     try:
         subprocess.run(
             cmd,
-            env=conf_env,
-            cwd=tmp,
+            env=env,
+            cwd=cwd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
             text=True,
@@ -236,15 +300,48 @@ def _publish_board_data(
         status.stop()
         log.error(e.output)
         raise SystemExit(e.returncode)
-    else:
-        return conf_path, conf_env
+
+
+def _delete_runs(
+    run_ids: list[str],
+    conf_path: str,
+    conf_env: dict[str, str],
+    board_dest: BoardDest,
+    status: cli.Status,
+):
+    tmp = os.path.dirname(conf_path)
+    includes_path = os.path.join(tmp, "delete-includes")
+    with open(includes_path, "w") as f:
+        for run_id in run_ids:
+            f.write(
+                f"/{run_id}/**\n"
+                f"/{run_id}.meta/**\n"
+                f"/{run_id}.meta.zip\n"
+                f"/{run_id}.user/**\n"
+            )
+    cmd = _rclone_cmd(
+        [
+            "--config",
+            "rclone.conf",
+            "delete",
+            f"gage:{board_dest.bucket}/runs",
+            "--include-from",
+            "delete-includes",
+            "--rmdirs",
+        ]
+    )
+    _run_rclone(cmd, conf_env, tmp, status)
 
 
 def _copy_runs(
-    runs: list[Run], conf_path: str, conf_env: dict[str, str], board_dest: BoardDest
+    runs: list[Run],
+    conf_path: str,
+    conf_env: dict[str, str],
+    board_dest: BoardDest,
+    sync: bool = False,
 ):
     dest = f"gage:{board_dest.bucket}/runs"
-    _copy_to_(runs, dest, sync=True, config_path=conf_path, env=conf_env)
+    _copy_to_(runs, dest, sync=sync, config_path=conf_path, env=conf_env)
 
 
 def _delete_conf_tmp(conf_path: str):
@@ -30,14 +30,12 @@ Where = Annotated[
     ),
 ]
 
-AllFlag = Annotated[
-    bool,
-    Option(
-        "-a",
-        "--all",
-        help="Purge match files for all runs.",
-    ),
-]
+
+def _all_flag(help: str):
+    return Annotated[bool, Option("-a", "--all", help=help)]
+
+
+AllFlag = _all_flag("Purge match files for all runs.")
 
 FilePatterns = Annotated[
     Optional[list[str]],
@@ -98,6 +96,92 @@ def purge_run_files(
     )
 
 
+CompactAllFlag = _all_flag("Compact attributes for all runs.")
+
+
+def compact_attrs(
+    ctx: Context,
+    runs: RunSpecs = None,
+    where: Where = "",
+    all: CompactAllFlag = False,
+):
+    """Compact logged run attributes.
+
+    Run labels, tags, comments and other user attributes are logged
+    as separate entries. Runs with many entries are slower to list.
+    Use this command to write a snapshot of current attributes, which
+    is used in place of reading compacted entries.
+
+    Log entries are not deleted. Snapshots are ignored when entries
+    are merged from other copies of a run.
+    """
+    from .util_impl import compact_attrs, RunsArgs
+
+    compact_attrs(RunsArgs(ctx, runs or [], where, all))
+
+
+MigrateAllFlag = _all_flag("Migrate all runs.")
+
+
+def migrate_meta(
+    ctx: Context,
+    runs: RunSpecs = None,
+    where: Where = "",
+    all: MigrateAllFlag = False,
+):
+    """Add meta records to finalized runs.
+
+    Finalized runs store a meta record with the run attributes used
+    to list runs. Runs finalized by earlier versions of Gage don't
+    have this record. Use this command to add it.
+
+    Runs that already have a meta record are not modified.
+    """
+    from .util_impl import migrate_meta, RunsArgs
+
+    migrate_meta(RunsArgs(ctx, runs or [], where, all))
+
+
+DigestAllFlag = _all_flag("Compute digests for all runs.")
+
+
+def digest(
+    ctx: Context,
+    runs: RunSpecs = None,
+    where: Where = "",
+    all: DigestAllFlag = False,
+):
+    """Compute full run file digests.
+
+    Operations configured with [arg]manifest.fingerprint-size[/]
+    record fingerprints rather than digests for large generated files.
+    A fingerprint is based on the file size, modified time, and
+    sampled file content, and is cheaper to compute than a digest.
+    Use this command to replace fingerprints with digests, e.g. before
+    copying runs.
+
+    Files that changed since they were fingerprinted are skipped.
+    """
+    from .util_impl import digest, RunsArgs
+
+    digest(RunsArgs(ctx, runs or [], where, all))
+
+
+def gc():
+    """Remove unreferenced run file objects.
+
+    When [arg]GAGE_OBJECT_STORE[/] is set to '1', read-only run
+    files are linked to objects in the runs directory so that runs
+    with the same files share storage. Objects that are no longer
+    used by runs are removed when runs are deleted. Use this command
+    to remove objects that are left when run files are deleted in
+    other ways.
+    """
+    from .util_impl import gc
+
+    gc()
+
+
 def app():
     app = Typer(
         cls=cli.AliasGroup,
@@ -113,5 +197,9 @@ def app():
         subcommand_metavar="command",
         options_metavar="[options]",
     )
+    app.command("compact-attrs")(compact_attrs)
+    app.command("digest")(digest)
+    app.command("gc")(gc)
+    app.command("migrate-meta")(migrate_meta)
     app.command("purge-run-files")(purge_run_files)
     return app
@@ -6,18 +6,122 @@ from ..types import *
 
 import fnmatch
 import os
+import zipfile
 
 from typer import Context
 
+from .. import attr_log
 from .. import cli
+from .. import run_meta
+from .. import var
+
+from ..run_attr import run_user_dir
 
 from ..file_util import delete_file
 from ..file_util import format_file_size
 from ..file_util import safe_ls
 
+from ..object_store import gc_objects
+
+from ..run_util import fill_manifest_digests
+
 from .impl_support import selected_runs
 
 
+class RunsArgs(NamedTuple):
+    ctx: Context
+    runs: list[str]
+    where: str
+    all: bool
+
+
+def compact_attrs(args: RunsArgs):
+    _apply_runs(
+        args,
+        _compact_run_attrs,
+        "Compacting run attributes",
+        "Compacted {} run(s)",
+    )
+
+
+def _compact_run_attrs(run: Run):
+    user_dir = run_user_dir(run)
+    if not os.path.isdir(user_dir):
+        return False
+    try:
+        return attr_log.compact_attrs(user_dir)
+    except (OSError, ValueError) as e:
+        cli.err(f"[red]Error compacting attributes for {run.name}: {e}")
+        return False
+
+
+def migrate_meta(args: RunsArgs):
+    _apply_runs(
+        args,
+        _migrate_run_meta,
+        "Migrating run meta",
+        "Migrated {} run(s)",
+    )
+
+
+def _migrate_run_meta(run: Run):
+    if not run_meta.is_zip(run.meta_dir):
+        return False
+    try:
+        return run_meta.write_meta_record(run.meta_dir)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        cli.err(f"[red]Error migrating {run.name}: {e}")
+        return False
+
+
+def digest(args: RunsArgs):
+    _apply_runs(
+        args,
+        _fill_run_digests,
+        "Computing run file digests",
+        "Updated digests for {} run(s)",
+    )
+
+
+def _fill_run_digests(run: Run):
+    try:
+        return fill_manifest_digests(run)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        cli.err(f"[red]Error computing digests for {run.name}: {e}")
+        return False
+
+
+def _apply_runs(
+    args: RunsArgs,
+    apply: Callable[[Run], bool],
+    desc: str,
+    msg: str,
+):
+    if not args.runs and not args.all:
+        _exit_with_missing_runs(args.ctx)
+    runs, _ = selected_runs(args)
+    if not runs:
+        cli.exit_with_message("Nothing selected")
+    applied = 0
+    for _, run in cli.track(runs, desc, transient=True):
+        if apply(run):
+            applied += 1
+    cli.err(msg.format(applied))
+
+
+def gc():
+    removed, removed_bytes = gc_objects(var.runs_dir())
+    cli.err(f"Removed {removed} object(s) ({format_file_size(removed_bytes)})")
+
+
+def _exit_with_missing_runs(ctx: Context):
+    cli.exit_with_error(
+        "Specify a run or use '--all'.\n\n"
+        f"Try '[cmd]{ctx.command_path} {ctx.help_option_names[0]}[/]' "
+        "for additional help."
+    )
+
+
 class PurgeRunFilesArgs(NamedTuple):
     ctx: Context
     runs: list[str]
@@ -30,11 +134,7 @@ class PurgeRunFilesArgs(NamedTuple):
 
 def purge_run_files(args: PurgeRunFilesArgs):
     if not args.runs and not args.all:
-        cli.exit_with_error(
-            "Specify a run or use '--all'.\n\n"
-            f"Try '[cmd]{args.ctx.command_path} {args.ctx.help_option_names[0]}[/]' "
-            "for additional help."
-        )
+        _exit_with_missing_runs(args.ctx)
     if not args.patterns:
         cli.exit_with_error("Specify at least one file pattern using '-f / --files'")
     runs, _ = selected_runs(args)
@@ -367,13 +367,20 @@ class FileCopyHandler:
 
     def _try_copy_file(self, src_filename: str, dest_filename: str):
         try:
-            shutil.copyfile(src_filename, dest_filename)
-            shutil.copymode(src_filename, dest_filename)
+            self.copy_file(src_filename, dest_filename)
         except IOError as e:
             if e.errno != errno.EEXIST:
                 if not self.handle_copy_error(e, src_filename, dest_filename):
                     raise
 
+    def copy_file(self, src_filename: str, dest_filename: str):
+        """Copies a file.
+
+        Override to change how a selected file is copied.
+        """
+        shutil.copyfile(src_filename, dest_filename)
+        shutil.copymode(src_filename, dest_filename)
+
     def ignore(self, filename: str, results: FileSelectResults | None):
         """Called when a file is ignored for copy.
 
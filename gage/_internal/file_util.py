@@ -10,20 +10,26 @@ import re
 import shutil
 import stat
 import subprocess
+import sys
 import tempfile
 import time
 
+from .hash_cache import cached_file_digests
+
 __all__ = [
     "Chdir",
     "TempDir",
     "TempFile",
     "compare_paths",
+    "copy_file_sha256",
     "copy_tree",
     "delete_file",
     "dir_size",
     "ensure_dir",
     "ensure_safe_delete_tree",
     "expand_path",
+    "fast_copy_file",
+    "file_fingerprint",
     "file_md5",
     "file_sha1",
     "file_sha256",
@@ -32,11 +38,13 @@ __all__ = [
     "format_file_size",
     "ls",
     "find_up",
+    "is_fingerprint",
     "is_readonly",
     "is_text_file",
     "make_dir",
     "make_executable",
     "make_temp_dir",
+    "parse_file_size",
     "realpath",
     "delete_temp_dir",
     "safe_delete_tree",
@@ -339,46 +347,118 @@ def _resolve_path(p: str):
     return realpath(os.path.expanduser(p))
 
 
-def file_sha256(path: str, use_cache: bool = True):
-    if use_cache:
-        cached_sha = try_cached_sha(path)
-        if cached_sha:
-            return cached_sha
+def file_sha256(path: str, cache_root: str | None = None):
+    """Returns the SHA 256 digest of a file.
 
+    If `cache_root` is specified, the digest is read from and saved to
+    the hash cache in that directory (see `hash_cache`).
+    """
+    if cache_root:
+        return cached_file_digests(cache_root, [path], _file_sha256s)[0]
     return _gen_file_hash(path, hashlib.sha256())
 
 
+def _file_sha256s(paths: list[str]):
+    return [_gen_file_hash(path, hashlib.sha256()) for path in paths]
+
+
+def copy_file_sha256(src: str, dest: str):
+    """Copies src to dest and returns the SHA 256 digest of src.
+
+    The digest is computed as the file is copied, avoiding a separate
+    read of the file. Copies file mode but not other file metadata.
+    """
+    hash = hashlib.sha256()
+    buf = bytearray(_HASH_BUF_SIZE)
+    view = memoryview(buf)
+    with open(src, "rb") as f_src, open(dest, "wb") as f_dest:
+        while True:
+            n = f_src.readinto(buf)
+            if not n:
+                break
+            hash.update(view[:n])
+            f_dest.write(view[:n])
+    shutil.copymode(src, dest)
+    return hash.hexdigest()
+
+
 def file_sha1(path: str):
     return _gen_file_hash(path, hashlib.sha1())
 
 
+FINGERPRINT_PREFIX = "fingerprint:"
+
+_FINGERPRINT_SAMPLES = 16
+
+_FINGERPRINT_SAMPLE_SIZE = 64 * 1024
+
+
+def file_fingerprint(path: str):
+    """Returns a fingerprint for a file.
+
+    A fingerprint is a cheap substitute for a file digest. It has the
+    form `fingerprint:<size>:<mtime ns>:<sample digest>` where sample
+    digest is the SHA 256 digest of the file size and evenly spaced
+    chunks read from the file. A fingerprint does not detect all changes
+    to a file and should be replaced with a digest when one is needed.
+    """
+    hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        hash.update(str(st.st_size).encode())
+        for offset in _fingerprint_offsets(st.st_size):
+            f.seek(offset)
+            hash.update(f.read(_FINGERPRINT_SAMPLE_SIZE))
+    return f"{FINGERPRINT_PREFIX}{st.st_size}:{st.st_mtime_ns}:{hash.hexdigest()}"
+
+
+def _fingerprint_offsets(size: int):
+    if size <= _FINGERPRINT_SAMPLES * _FINGERPRINT_SAMPLE_SIZE:
+        return range(0, size, _FINGERPRINT_SAMPLE_SIZE)
+    # Samples include the start and end of the file
+    step = (size - _FINGERPRINT_SAMPLE_SIZE) // (_FINGERPRINT_SAMPLES - 1)
+    return [i * step for i in range(_FINGERPRINT_SAMPLES)]
+
+
+def is_fingerprint(digest: str):
+    """Returns True if digest is a file fingerprint."""
+    return digest.startswith(FINGERPRINT_PREFIX)
+
+
+# Files at least this size are hashed using mmap
+_HASH_MMAP_MIN_SIZE = 4 * 1024 * 1024
+
+_HASH_BUF_SIZE = 1024 * 1024
+
+
 def _gen_file_hash(path: str, hash: "hashlib._Hash"):
+    # hashlib releases the GIL when hashing large buffers so files can
+    # be hashed concurrently in threads
     with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= _HASH_MMAP_MIN_SIZE and _mmap_hash(f, hash):
+            return hash.hexdigest()
+        buf = bytearray(_HASH_BUF_SIZE)
+        view = memoryview(buf)
         while True:
-            data = f.read(102400)
-            if not data:
+            n = f.readinto(buf)
+            if not n:
                 break
-            hash.update(data)
+            hash.update(view[:n])
     return hash.hexdigest()
 
 
-def try_cached_sha(for_file: str):
-    try:
-        f = open(_cached_sha_filename(for_file), "r")
-    except IOError:
-        return None
-    else:
-        return f.read().rstrip()
-
+def _mmap_hash(f: IO[bytes], hash: "hashlib._Hash"):
+    import mmap
 
-def _cached_sha_filename(for_file: str):
-    parent, name = os.path.split(for_file)
-    return os.path.join(parent, f".gage-cache-{name}.sha")
-
-
-def write_cached_sha(sha: str, for_file: str):
-    with open(_cached_sha_filename(for_file), "w") as f:
-        f.write(sha)
+    try:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # Not all files can be mapped - fall back to reading
+        return False
+    with m:
+        hash.update(m)
+    return True
 
 
 def file_md5(path: str):
@@ -527,6 +607,68 @@ def copy_file(src: str, dest: str):
     shutil.copymode(src, dest)
 
 
+# Linux ioctl to share file extents (reflink) - see ioctl_ficlone(2)
+_FICLONE = 0x40049409
+
+
+def fast_copy_file(src: str, dest: str):
+    """Copies src to dest using the fastest available method.
+
+    Tries in order a reflink (Linux file systems that support shared
+    extents), `os.copy_file_range()`, and `shutil.copyfile()`. File
+    mode is copied to dest.
+    """
+    with open(src, "rb") as f_src, open(dest, "wb") as f_dest:
+        if not _try_reflink(f_src, f_dest) and not _try_copy_file_range(f_src, f_dest):
+            f_src.seek(0)
+            f_dest.seek(0)
+            f_dest.truncate()
+            shutil.copyfileobj(f_src, f_dest)
+    shutil.copymode(src, dest)
+
+
+def _try_reflink(f_src: IO[bytes], f_dest: IO[bytes]):
+    if sys.platform != "linux":
+        return False
+    import fcntl
+
+    try:
+        fcntl.ioctl(f_dest.fileno(), _FICLONE, f_src.fileno())
+    except OSError:
+        return False
+    else:
+        return True
+
+
+def _try_copy_file_range(f_src: IO[bytes], f_dest: IO[bytes]):
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if not copy_file_range:
+        return False
+    src_fd, dest_fd = f_src.fileno(), f_dest.fileno()
+    size = os.fstat(src_fd).st_size
+    copied = 0
+    try:
+        while copied < size:
+            n = copy_file_range(src_fd, dest_fd, size - copied)
+            if n == 0:
+                break
+            copied += n
+    except OSError as e:
+        if copied == 0 and e.errno in _COPY_FILE_RANGE_UNSUPPORTED:
+            return False
+        raise
+    return True
+
+
+_COPY_FILE_RANGE_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.EBADF,
+}
+
+
 def _windows_symlink(target: str, link: str):
     if os.path.isdir(target):
         args = ["mklink", "/D", link, target]
@@ -707,6 +849,44 @@ def format_file_size(size: int):
     return human_readable.file_size(size, formatting=".1f")
 
 
+_FILE_SIZE_UNITS = {
+    "": 1,
+    "B": 1,
+    "KB": 1000,
+    "MB": 1000**2,
+    "GB": 1000**3,
+    "TB": 1000**4,
+    "KIB": 1024,
+    "MIB": 1024**2,
+    "GIB": 1024**3,
+    "TIB": 1024**4,
+}
+
+
+def parse_file_size(val: int | float | str):
+    """Returns the number of bytes for a file size.
+
+    `val` is a number or a string with an optional unit (e.g. "10 MB"
+    or "1GiB"). Raises ValueError if val is not a valid file size.
+    """
+    if isinstance(val, bool):
+        raise ValueError(val)
+    if isinstance(val, (int, float)):
+        if val < 0 or val != val or val == float("inf"):
+            raise ValueError(val)
+        return int(val)
+    if not isinstance(val, str):
+        raise ValueError(val)
+    m = re.match(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*$", val)
+    if not m:
+        raise ValueError(val)
+    try:
+        scale = _FILE_SIZE_UNITS[m.group(2).upper()]
+    except KeyError:
+        raise ValueError(val) from None
+    return int(float(m.group(1)) * scale)
+
+
 def delete_file(path: str):
     if os.name == "nt":
         os.chmod(path, stat.S_IWRITE)
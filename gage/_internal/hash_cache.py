@@ -0,0 +1,191 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+import logging
+import os
+import sqlite3
+import time
+
+from .cache_util import delete_cache_db
+from .cache_util import is_racy
+from .cache_util import open_cache_db
+
+__all__ = [
+    "HASH_CACHE_NAME",
+    "cached_file_digests",
+    "delete_hash_cache",
+]
+
+log = logging.getLogger(__name__)
+
+HASH_CACHE_NAME = ".hash-cache.db"
+
+HASH_CACHE_SCHEMA = 2
+
+# The hash cache stores SHA 256 digests of files in a runs directory.
+# Digests are keyed by file device and inode and are reused as long as
+# the file size and modified time are unchanged. Change time is not
+# used as it changes when files are hard linked (e.g. to the object
+# store) without changing file content.
+#
+# The cache is bounded (see `_max_entries()`). When the cache exceeds
+# its size, the least recently used entries are removed. Files with
+# racy modified times (see `cache_util.is_racy()`) are not cached.
+
+_DEFAULT_MAX_ENTRIES = 100_000
+
+_CREATE_DIGESTS = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (dev, ino)
+)
+"""
+
+_CREATE_USED_INDEX = "CREATE INDEX IF NOT EXISTS digests_used ON digests (used)"
+
+
+def cached_file_digests(
+    root: str,
+    filenames: list[str],
+    file_digests: Callable[[list[str]], list[str]],
+) -> list[str]:
+    """Returns SHA 256 digests for a list of files.
+
+    `file_digests` is a function that returns digests for a list of
+    files. It's called once with the files that aren't cached or that
+    have changed since they were cached.
+
+    Digests are cached in `root`, which is typically a runs directory.
+
+    The cache is not used if `NO_HASH_CACHE` is set to "1".
+    """
+    if not filenames:
+        return []
+    if os.getenv("NO_HASH_CACHE") == "1":
+        return file_digests(filenames)
+    stats = [_try_stat(filename) for filename in filenames]
+    path = os.path.join(root, HASH_CACHE_NAME)
+    try:
+        db = open_cache_db(
+            path, HASH_CACHE_SCHEMA, ["digests"], [_CREATE_DIGESTS, _CREATE_USED_INDEX]
+        )
+    except sqlite3.Error as e:
+        log.debug("Cannot use hash cache %s: %s", path, e)
+        return file_digests(filenames)
+    try:
+        return _apply_cache(db, path, filenames, stats, file_digests)
+    finally:
+        db.close()
+
+
+def delete_hash_cache(root: str):
+    """Deletes the hash cache in `root`."""
+    delete_cache_db(root, HASH_CACHE_NAME)
+
+
+def _try_stat(filename: str):
+    try:
+        return os.stat(filename)
+    except OSError:
+        return None
+
+
+def _apply_cache(
+    db: sqlite3.Connection,
+    path: str,
+    filenames: list[str],
+    stats: list[os.stat_result | None],
+    file_digests: Callable[[list[str]], list[str]],
+):
+    # Files are hashed outside of a transaction so that other processes
+    # can use the cache in the meantime. Cache updates are written in a
+    # single short transaction once digests are known.
+    now = time.time_ns()
+    try:
+        digests = _read_cached_digests(db, stats)
+    except sqlite3.Error as e:
+        log.debug("Error reading hash cache %s: %s", path, e)
+        digests = [None] * len(filenames)
+    hits = [
+        (now, st.st_dev, st.st_ino)
+        for st, digest in zip(stats, digests)
+        if st and digest is not None
+    ]
+    pending = [i for i, digest in enumerate(digests) if digest is None]
+    updates: list[tuple[int, int, int, int, str, int]] = []
+    if pending:
+        computed = file_digests([filenames[i] for i in pending])
+        for i, digest in zip(pending, computed):
+            digests[i] = digest
+            st = stats[i]
+            if st and not is_racy(st.st_mtime_ns, now):
+                updates.append((*_stat_key(st), digest, now))
+    try:
+        with db:
+            _write_cache(db, hits, updates)
+    except sqlite3.Error as e:
+        log.debug("Error updating hash cache %s: %s", path, e)
+    return cast(list[str], digests)
+
+
+def _read_cached_digests(db: sqlite3.Connection, stats: list[os.stat_result | None]):
+    digests: list[str | None] = [None] * len(stats)
+    for i, st in enumerate(stats):
+        if st is None:
+            continue
+        row = db.execute(
+            "SELECT digest FROM digests "
+            "WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?",
+            _stat_key(st),
+        ).fetchone()
+        if row:
+            digests[i] = row[0]
+    return digests
+
+
+def _write_cache(
+    db: sqlite3.Connection,
+    hits: list[tuple[int, int, int]],
+    updates: list[tuple[int, int, int, int, str, int]],
+):
+    if hits:
+        db.executemany("UPDATE digests SET used = ? WHERE dev = ? AND ino = ?", hits)
+    if updates:
+        log.debug("Adding %i digest(s) to hash cache", len(updates))
+        db.executemany(
+            "INSERT OR REPLACE INTO digests "
+            "(dev, ino, size, mtime_ns, digest, used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            updates,
+        )
+        _evict(db)
+
+
+def _stat_key(st: os.stat_result):
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _evict(db: sqlite3.Connection):
+    max_entries = _max_entries()
+    count = db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+    if count <= max_entries:
+        return
+    log.debug("Removing %i digest(s) from hash cache", count - max_entries)
+    db.execute(
+        "DELETE FROM digests WHERE rowid IN "
+        "(SELECT rowid FROM digests ORDER BY used LIMIT ?)",
+        (count - max_entries,),
+    )
+
+
+def _max_entries():
+    try:
+        return int(os.environ["GAGE_HASH_CACHE_SIZE"])
+    except (KeyError, ValueError):
+        return _DEFAULT_MAX_ENTRIES
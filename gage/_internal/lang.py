@@ -26,8 +26,6 @@ config_value: QUOTED_STRING   -> quoted_string
             | "null"          -> null
             | ANY             -> dynamic
 
-where_expr: ANY   -> run_string_match
-
 _STRING_INNER: /.*?/
 _STRING_ESC_INNER: _STRING_INNER /(?<!\\)(\\\\)*?/
 
@@ -49,6 +47,42 @@ KEY: /[\w_\.][\w_\.\-]*/
 %ignore WS_INLINE
 """
 
+WHERE_GRAMMAR = r"""
+?where_expr: or_expr
+
+?or_expr: and_expr ("or" and_expr)*
+?and_expr: not_expr ("and" not_expr)*
+?not_expr: "not" not_expr  -> not_expr
+         | atom
+
+?atom: "(" or_expr ")"
+     | WORD COMPARE_OP value  -> compare
+     | QUOTED_STRING          -> match_quoted
+     | WORD                   -> match
+
+value: QUOTED_STRING  -> quoted_string
+     | WORD           -> dynamic
+
+COMPARE_OP: "<=" | ">=" | "!=" | "==" | "=" | "<" | ">"
+
+WORD: /[^\s=!<>()'"]+/
+
+_STRING_INNER: /.*?/
+_STRING_ESC_INNER: _STRING_INNER /(?<!\\)(\\\\)*?/
+
+_QUOTED_STRING_DOUBLE: "\"" _STRING_ESC_INNER "\""
+_QUOTED_STRING_SINGLE: "'" _STRING_ESC_INNER "'"
+
+QUOTED_STRING: _QUOTED_STRING_DOUBLE | _QUOTED_STRING_SINGLE
+
+%import common.WS
+
+%ignore WS
+"""
+
+# Characters that indicate a where expression is not a string match
+_WHERE_EXPR_CHARS = set("=!<>()")
+
 
 def parse_config_value(s: str) -> RunConfigValue:
     s = s.strip()
@@ -110,9 +144,27 @@ def _ensure_flag_assign_parser() -> Lark:
 
 
 def parse_where_expr(s: str) -> RunFilter:
+    """Returns a run filter for a where expression.
+
+    Where expressions are terms combined with 'and', 'or', and 'not'
+    and grouped with parentheses. A term is either a comparison of a
+    run attribute with a value (e.g. 'status=completed' or
+    'metric:loss < 0.2') or a string that's matched to run operation,
+    status, and label.
+
+    For compatibility with string matches, an expression that can't be
+    parsed and that doesn't contain comparison operators or parentheses
+    is treated as a single string match.
+    """
     s = s.strip()
     p = _ensure_where_expr_parser()
-    return cast(RunFilter, _parse(p, s))
+    try:
+        node = _parse(p, s)
+    except ValueError:
+        if _WHERE_EXPR_CHARS.intersection(s):
+            raise
+        node = ("match", s)
+    return run_filter.where_filter(node)
 
 
 __where_expr_parser: Lark | None = None
@@ -121,10 +173,10 @@ __where_expr_parser: Lark | None = None
 def _ensure_where_expr_parser() -> Lark:
     if __where_expr_parser is None:
         globals()["__where_expr_parser"] = Lark(
-            GRAMMAR,
+            WHERE_GRAMMAR,
             start="where_expr",
             parser="lalr",
-            transformer=GrammarTransformer(),
+            transformer=WhereExprTransformer(),
         )
     assert __where_expr_parser
     return __where_expr_parser
@@ -170,6 +222,36 @@ class GrammarTransformer(Transformer):
         (s,) = tokens
         return s.value
 
-    def run_string_match(self, tokens: list[Token]):
+
+_WHERE_LITERALS = {"true": True, "false": False, "null": None}
+
+
+class WhereExprTransformer(GrammarTransformer):
+    def dynamic(self, tokens: list[Token]):
+        (s,) = tokens
+        try:
+            return _WHERE_LITERALS[s.value]
+        except KeyError:
+            return super().dynamic(tokens)
+
+    def or_expr(self, nodes: list[Any]):
+        return ("or", nodes)
+
+    def and_expr(self, nodes: list[Any]):
+        return ("and", nodes)
+
+    def not_expr(self, nodes: list[Any]):
+        (node,) = nodes
+        return ("not", node)
+
+    def compare(self, tokens: list[Any]):
+        attr, op, value = tokens
+        return ("compare", attr.value, op.value, value)
+
+    def match(self, tokens: list[Token]):
+        (s,) = tokens
+        return ("match", s.value)
+
+    def match_quoted(self, tokens: list[Token]):
         (s,) = tokens
-        return run_filter.string_match_filter(s)
+        return ("match", s.value[1:-1])
@@ -0,0 +1,181 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import logging
+import os
+import stat
+import uuid
+
+from . import run_meta
+
+from .file_util import delete_file
+
+__all__ = [
+    "OBJECTS_DIR",
+    "gc_objects",
+    "link_object",
+    "object_path",
+    "object_store_enabled",
+    "release_run_objects",
+    "run_manifest_digests",
+    "run_object_digests",
+]
+
+log = logging.getLogger(__name__)
+
+OBJECTS_DIR = ".objects"
+
+# The object store is an opt-in directory of run files in a runs
+# directory. Objects are named by the SHA 256 digest recorded for a
+# file in a run manifest. Read-only run files are hard linked to their
+# object so that runs with the same files share storage.
+#
+# An object is referenced by each run file linked to it. An object
+# with a single link isn't referenced by a run and is removed by
+# `gc_objects()`.
+#
+# The store is used when `GAGE_OBJECT_STORE` is set to "1".
+
+
+def object_store_enabled():
+    """Returns True if run files are stored in the object store."""
+    return os.getenv("GAGE_OBJECT_STORE") == "1"
+
+
+def object_path(root: str, digest: str):
+    """Returns the path of an object in a runs directory."""
+    return os.path.join(root, OBJECTS_DIR, digest[:2], digest[2:])
+
+
+def link_object(root: str, filename: str, digest: str):
+    """Links a file to its object in the object store for root.
+
+    If the object doesn't exist, it's created as a link to the file.
+    Otherwise the file is replaced with a link to the object.
+
+    `filename` must be read-only and must not change. Returns True if
+    the file is linked to its object, otherwise returns False.
+    """
+    try:
+        st = os.lstat(filename)
+    except OSError as e:
+        log.debug("Cannot store %s: %s", filename, e)
+        return False
+    if not stat.S_ISREG(st.st_mode):
+        return False
+    path = object_path(root, digest)
+    try:
+        return _link_object(filename, st, path)
+    except OSError as e:
+        # Links aren't supported across devices or by all file systems
+        log.debug("Cannot link %s to object %s: %s", filename, path, e)
+        return False
+
+
+def _link_object(filename: str, st: os.stat_result, path: str):
+    try:
+        obj_st = os.stat(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(filename, path)
+        except FileExistsError:
+            obj_st = os.stat(path)
+        else:
+            return True
+    if os.path.samestat(st, obj_st):
+        return True
+    if obj_st.st_size != st.st_size:
+        log.debug("Object %s size differs from %s, skipping", path, filename)
+        return False
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}.link"
+    os.link(path, tmp_filename)
+    try:
+        os.replace(tmp_filename, filename)
+    except OSError:
+        # Don't use `delete_file()`, which changes the shared file mode
+        os.remove(tmp_filename)
+        raise
+    return True
+
+
+def run_object_digests(run: Run) -> list[str]:
+    """Returns the file digests in a run manifest."""
+    return list((run_manifest_digests(run) or {}).values())
+
+
+def run_manifest_digests(run: Run) -> dict[str, str] | None:
+    """Returns a dict of file paths to digests in a run manifest.
+
+    Returns None if the run manifest can't be read.
+    """
+    try:
+        f = run_meta.open_manifest(run)
+    except OSError:
+        return None
+    with f:
+        # Manifest entries are "<type> <digest> <path>"
+        entries = [line.rstrip("\n").split(" ", 2) for line in f if line.strip()]
+    return {parts[2]: parts[1] for parts in entries if len(parts) == 3}
+
+
+def release_run_objects(root: str, digests: list[str]):
+    """Removes objects for digests that are no longer referenced.
+
+    Use after deleting run files to remove objects that were used only
+    by those files. Returns the number of removed objects.
+    """
+    if not os.path.isdir(os.path.join(root, OBJECTS_DIR)):
+        return 0
+    removed = 0
+    for digest in set(digests):
+        path = object_path(root, digest)
+        if _remove_unreferenced(path) is not None:
+            removed += 1
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+    return removed
+
+
+def gc_objects(root: str) -> tuple[int, int]:
+    """Removes objects in root that aren't referenced by run files.
+
+    Returns a tuple of the number of removed objects and the total bytes
+    removed.
+    """
+    objects_dir = os.path.join(root, OBJECTS_DIR)
+    removed = 0
+    removed_bytes = 0
+    for dirpath, dirnames, filenames in os.walk(objects_dir, topdown=False):
+        for name in filenames:
+            size = _remove_unreferenced(os.path.join(dirpath, name))
+            if size is not None:
+                removed += 1
+                removed_bytes += size
+        if dirpath != objects_dir:
+            try:
+                os.rmdir(dirpath)
+            except OSError:
+                pass
+    return removed, removed_bytes
+
+
+def _remove_unreferenced(path: str):
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if st.st_nlink > 1:
+        return None
+    log.debug("Removing unreferenced object %s", path)
+    try:
+        delete_file(path)
+    except OSError as e:
+        log.debug("Error removing object %s: %s", path, e)
+        return None
+    return st.st_size
@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import uuid
+
+__all__ = [
+    "PUBLISH_STATE_DIR",
+    "PublishPlan",
+    "PublishState",
+    "board_data_gzip",
+    "publish_plan",
+    "published_run_sig",
+    "read_publish_state",
+    "write_publish_state",
+]
+
+log = logging.getLogger(__name__)
+
+PUBLISH_STATE_DIR = ".publish"
+
+# Publish state is a record of what was last published for a board. It
+# is stored in the runs directory as `.publish/<board ID>.json` and is
+# used to skip board data and runs that haven't changed since they were
+# last published.
+
+
+class PublishState(NamedTuple):
+    board_digest: str | None
+    runs: dict[str, str]
+
+
+class PublishPlan(NamedTuple):
+    board_digest: str
+    publish_board: bool
+    copy_runs: list[Run]
+    delete_runs: list[str]
+    state: PublishState
+
+
+def read_publish_state(root: str, board_id: str) -> PublishState:
+    """Returns the publish state for a board.
+
+    Returns an empty state if the board hasn't been published from
+    `root` or if its state cannot be read.
+    """
+    filename = _state_filename(root, board_id)
+    try:
+        with open(filename) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return PublishState(None, {})
+    except (OSError, ValueError) as e:
+        log.debug("Error reading publish state %s: %s", filename, e)
+        return PublishState(None, {})
+    return PublishState(data.get("board-digest"), data.get("runs") or {})
+
+
+def write_publish_state(root: str, board_id: str, state: PublishState):
+    """Writes the publish state for a board."""
+    filename = _state_filename(root, board_id)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_filename, "w") as f:
+            json.dump({"board-digest": state.board_digest, "runs": state.runs}, f)
+        os.replace(tmp_filename, filename)
+    finally:
+        try:
+            os.remove(tmp_filename)
+        except FileNotFoundError:
+            pass
+
+
+def _state_filename(root: str, board_id: str):
+    return os.path.join(root, PUBLISH_STATE_DIR, f"{board_id}.json")
+
+
+def board_data_gzip(data: dict[str, Any]) -> tuple[bytes, str]:
+    """Returns gzip compressed board data and its digest.
+
+    The digest is a SHA 256 hex digest of the uncompressed data.
+    Compressed data is the same for the same board data.
+    """
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    return gzip.compress(encoded, mtime=0), hashlib.sha256(encoded).hexdigest()
+
+
+def published_run_sig(run: Run) -> str | None:
+    """Returns a signature used to detect changes to a published run.
+
+    Only finalized runs (i.e. runs with zipped meta) have a signature.
+    The signature reflects changes to run meta and to run user
+    attributes. Returns None if a run isn't finalized.
+    """
+    if not run.meta_dir.endswith(".meta.zip"):
+        return None
+    try:
+        st = os.stat(run.meta_dir)
+    except OSError:
+        return None
+    try:
+        user_mtime = os.stat(run.meta_dir[:-9] + ".user").st_mtime_ns
+    except OSError:
+        user_mtime = 0
+    return f"{st.st_mtime_ns}:{st.st_size}:{user_mtime}"
+
+
+def publish_plan(
+    state: PublishState,
+    board_digest: str,
+    runs: list[Run],
+    skip_runs: bool = False,
+) -> PublishPlan:
+    """Returns a plan for publishing a board.
+
+    Board data is published if its digest differs from the digest in
+    `state`. Runs are copied if they're new or changed since they were
+    last published. Runs that were published but are no longer in
+    `runs` are deleted.
+
+    If `skip_runs` is True, runs are neither copied nor deleted and the
+    published runs in `state` are unchanged.
+    """
+    publish_board = board_digest != state.board_digest
+    if skip_runs:
+        return PublishPlan(
+            board_digest,
+            publish_board,
+            [],
+            [],
+            PublishState(board_digest, state.runs),
+        )
+    sigs = {run.id: published_run_sig(run) for run in runs}
+    copy_runs = [
+        run
+        for run in runs
+        if not sigs[run.id] or sigs[run.id] != state.runs.get(run.id)
+    ]
+    delete_runs = sorted(run_id for run_id in state.runs if run_id not in sigs)
+    published = {run_id: sig for run_id, sig in sigs.items() if sig}
+    return PublishPlan(
+        board_digest,
+        publish_board,
+        copy_runs,
+        delete_runs,
+        PublishState(board_digest, published),
+    )
@@ -0,0 +1,168 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import hashlib
+import json
+import logging
+import os
+
+from . import run_meta
+
+from .opref_util import decode_opref
+from .opref_util import encode_opref
+
+from .run_attr import decode_run_timestamp
+from .run_attr import encode_run_timestamp
+from .run_attr import preload_run_attrs
+from .run_attr import run_attr
+from .run_attr import run_config
+from .run_attr import run_label
+from .run_attr import run_status
+from .run_attr import run_summary
+from .run_attr import run_user_attrs
+
+from .run_util import run_name_for_id
+
+__all__ = [
+    "REMOTE_INDEX_NAME",
+    "RemoteIndex",
+    "decode_remote_index",
+    "encode_remote_index",
+    "remote_index_entry",
+    "remote_index_runs",
+    "update_remote_index",
+]
+
+log = logging.getLogger(__name__)
+
+REMOTE_INDEX_NAME = ".remote-index.json"
+
+REMOTE_INDEX_SCHEMA = 1
+
+# A remote index is a JSON file at the root of a copy destination that
+# lists the runs copied there. It's written by `gage copy --dest` and
+# read by `gage copy --src` to list and filter runs at a location
+# without reading run files, which may be remote.
+#
+# Index entries are keyed by run ID. Each entry has the run meta name,
+# encoded opref, status, timestamps, label, config, summary, user
+# attributes, and a digest of the run manifest.
+
+RemoteIndex = dict[str, dict[str, Any]]
+
+_TIMESTAMPS = ("staged", "started", "stopped", "timestamp")
+
+
+def remote_index_entry(run: Run) -> dict[str, Any]:
+    """Returns a remote index entry for a run."""
+    return {
+        "meta": os.path.basename(run.meta_dir),
+        "opref": encode_opref(run.opref),
+        "status": run_status(run),
+        "exit_code": run_attr(run, "exit_code", None),
+        **{
+            name: encode_run_timestamp(run_attr(run, name, None))
+            for name in _TIMESTAMPS
+        },
+        "label": run_label(run),
+        "config": run_config(run),
+        "summary": run_summary(run).as_json(),
+        "user_attrs": run_user_attrs(run),
+        "manifest": _manifest_digest(run),
+    }
+
+
+def _manifest_digest(run: Run):
+    try:
+        f = run_meta.open_manifest(run)
+    except OSError:
+        return None
+    with f:
+        return hashlib.sha256(f.read().encode()).hexdigest()
+
+
+def update_remote_index(
+    index: RemoteIndex, runs: list[Run], sync: bool = False
+) -> RemoteIndex:
+    """Returns a remote index updated with entries for runs.
+
+    If `sync` is True, the returned index contains only `runs`.
+    """
+    entries = {run.id: remote_index_entry(run) for run in runs}
+    return entries if sync else {**index, **entries}
+
+
+def encode_remote_index(index: RemoteIndex) -> bytes:
+    """Returns encoded remote index data."""
+    return json.dumps(
+        {"schema": REMOTE_INDEX_SCHEMA, "runs": index},
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode()
+
+
+def decode_remote_index(data: bytes | str) -> RemoteIndex:
+    """Returns a remote index for encoded index data.
+
+    Raises ValueError if data is not a valid remote index.
+    """
+    decoded = json.loads(data)
+    if not isinstance(decoded, dict):
+        raise ValueError("unexpected index data")
+    if decoded.get("schema") != REMOTE_INDEX_SCHEMA:
+        raise ValueError(f"unsupported index schema: {decoded.get('schema')!r}")
+    runs = decoded.get("runs")
+    if not isinstance(runs, dict):
+        raise ValueError("missing runs")
+    return cast(RemoteIndex, runs)
+
+
+def remote_index_runs(root: str, index: RemoteIndex) -> list[Run]:
+    """Returns runs in a remote index.
+
+    Run paths are relative to `root`, which is the location of the
+    index. Run attributes are preloaded from the index and are not read
+    from run files.
+
+    Entries that cannot be read are skipped.
+    """
+    runs: list[Run] = []
+    for run_id, entry in index.items():
+        try:
+            runs.append(_run_for_entry(root, run_id, entry))
+        except (KeyError, TypeError, ValueError) as e:
+            log.debug("Invalid remote index entry for %s: %s", run_id, e)
+    return runs
+
+
+def _run_for_entry(root: str, run_id: str, entry: dict[str, Any]):
+    # Index data is read from a remote location and is not trusted -
+    # run paths are derived from the run ID, which must be a plain name
+    if not run_id or run_id in (".", "..") or "/" in run_id or os.sep in run_id:
+        raise ValueError(f"invalid run ID {run_id!r}")
+    meta_name = entry["meta"]
+    if meta_name not in (f"{run_id}.meta", f"{run_id}.meta.zip"):
+        raise ValueError(f"invalid meta name {meta_name!r}")
+    meta_dir = os.path.join(root, meta_name)
+    run = Run(
+        run_id,
+        decode_opref(entry["opref"]),
+        meta_dir,
+        os.path.join(root, run_id),
+        run_name_for_id(run_id),
+    )
+    preload_run_attrs(
+        run,
+        {
+            "status": entry["status"],
+            "exit_code": entry.get("exit_code"),
+            **{name: decode_run_timestamp(entry.get(name)) for name in _TIMESTAMPS},
+            "config": entry.get("config") or {},
+            "summary": entry.get("summary") or {},
+            "user_attrs": entry.get("user_attrs") or {},
+        },
+    )
+    return run
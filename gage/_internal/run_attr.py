@@ -3,6 +3,7 @@
 from typing import *
 
 import datetime
+import json
 import logging
 import os
 
@@ -16,6 +17,13 @@ from . import util
 
 __all__ = [
     "CORE_ATTRS",
+    "apply_meta_record",
+    "clear_preloaded_attrs",
+    "decode_run_timestamp",
+    "encode_run_timestamp",
+    "LISTED_RUN_ATTRS",
+    "prefetch_run_attrs",
+    "preload_run_attrs",
     "run_config",
     "run_attr",
     "run_label",
@@ -33,6 +41,10 @@ log = logging.getLogger(__name__)
 
 
 def run_status(run: Run):
+    try:
+        return cast(RunStatus, _preloaded(run, "status"))
+    except KeyError:
+        pass
     return cast(
         RunStatus,
         util.find_apply(
@@ -71,23 +83,39 @@ def _running_status(run: Run) -> Literal["running", "terminated"] | None:
         return "running" if _is_active_lock(lock_str) else "terminated"
 
 
+# Process create times reported by the system may vary (seconds)
+_CREATE_TIME_VARIANCE = 1.0
+
+
 def _is_active_lock(lock: str):
     try:
-        pid = int(lock)
+        pid, create_time = _parse_lock(lock)
     except ValueError:
         log.error("Invalid lock value %r - expected PID", lock)
         return None
+    if create_time is None:
+        # Lock doesn't identify the process - assume PID is valid
+        return util.pid_exists(pid)
+    # Ensure process snapshot includes processes created up to
+    # create_time, allowing for variance in reported create times
+    procs = util.process_snapshot(create_time + _CREATE_TIME_VARIANCE)
+    try:
+        proc_create_time = procs[pid]
+    except KeyError:
+        return False
     else:
-        import psutil
+        # Different create time means PID was reused
+        return abs(proc_create_time - create_time) < _CREATE_TIME_VARIANCE
 
-        # TODO: read lock = should have PID + some process hints to verify
-        # PID belongs to expected run - for now assume valid
-        try:
-            psutil.Process(pid)
-        except psutil.NoSuchProcess:
-            return False
-        else:
-            return True
+
+def _parse_lock(lock: str):
+    parts = lock.split()
+    if len(parts) == 1:
+        return int(parts[0]), None
+    elif len(parts) == 2:
+        return int(parts[0]), float(parts[1])
+    else:
+        raise ValueError(lock)
 
 
 def _staged_status(run: Run) -> Literal["staged"] | None:
@@ -113,7 +141,7 @@ def run_attr(run: Run, name: str, default: Any = _RAISE):
     """
     cache_name = f"_attr_{name}"
     try:
-        return run._cache[cache_name]
+        val = run._cache[cache_name]
     except KeyError:
         try:
             reader = cast(Callable[[Any, str, Any], Any], _ATTR_READERS[name])
@@ -127,6 +155,12 @@ def run_attr(run: Run, name: str, default: Any = _RAISE):
                 return default
             run._cache[cache_name] = val
             return val
+    else:
+        if val is _UNREAD:
+            if default is _RAISE:
+                raise AttributeError(name) from None
+            return default
+        return val
 
 
 def run_timestamp(run: Run, name: RunTimestamp, default: Any = None):
@@ -142,7 +176,27 @@ def run_timestamp(run: Run, name: RunTimestamp, default: Any = None):
             log.warning("Invalid timestamp '%s' in \"%s\"", name, run.meta_dir)
             return default
         else:
-            return datetime.datetime.fromtimestamp(timestamp_int / 1000000)
+            return decode_run_timestamp(timestamp_int)
+
+
+def decode_run_timestamp(val: int | None):
+    """Returns a datetime for a run timestamp in epoch microseconds.
+
+    Returns None if `val` is None.
+    """
+    if val is None:
+        return None
+    return datetime.datetime.fromtimestamp(val / 1000000)
+
+
+def encode_run_timestamp(val: Any) -> int | None:
+    """Returns a run timestamp datetime in epoch microseconds.
+
+    Returns None if `val` is not a datetime.
+    """
+    if not isinstance(val, datetime.datetime):
+        return None
+    return round(val.timestamp() * 1000000)
 
 
 def _run_dir_reader(run: Run, name: str, default: Any = None):
@@ -155,7 +209,16 @@ def _run_adaptive_timestamp_reader(run: Run, name: str, default: Any = None):
         val = run_timestamp(run, name, _UNREAD)
         if val is not _UNREAD:
             return val
-    return default
+    id_timestamp = _run_id_timestamp(run)
+    return id_timestamp if id_timestamp is not None else default
+
+
+def _run_id_timestamp(run: Run):
+    # Import here to avoid circular import
+    from .run_util import run_id_time
+
+    id_time = run_id_time(run.id)
+    return decode_run_timestamp(id_time * 1000) if id_time is not None else None
 
 
 def _run_exit_code_reader(run: Run, name: str, default: Any = None):
@@ -187,8 +250,24 @@ _ATTR_READERS = {
 
 CORE_ATTRS = list(_ATTR_READERS)
 
+LISTED_RUN_ATTRS = ("exit_code", "staged", "started", "stopped", "timestamp")
+
+
+def prefetch_run_attrs(run: Run, names: Sequence[str] = LISTED_RUN_ATTRS):
+    """Reads run attributes ahead of when they're needed.
+
+    Attributes are cached for the run. Use to read run attributes
+    concurrently. By default reads attributes used to list runs.
+    """
+    for name in names:
+        run_attr(run, name, None)
+
 
 def run_summary(run: Run) -> RunSummary:
+    try:
+        return RunSummary(_preloaded(run, "summary"))
+    except KeyError:
+        pass
     try:
         data = run_meta.read_summary(run)
     except FileNotFoundError:
@@ -208,6 +287,10 @@ def run_opref(run: Run):
 
 
 def run_config(run: Run) -> RunConfig:
+    try:
+        return cast(RunConfig, _preloaded(run, "config"))
+    except KeyError:
+        pass
     try:
         return run_meta.read_config(run)
     except FileNotFoundError:
@@ -215,12 +298,85 @@ def run_config(run: Run) -> RunConfig:
 
 
 def run_user_attrs(run: Run) -> dict[str, Any]:
+    try:
+        return _preloaded(run, "user_attrs")
+    except KeyError:
+        pass
     attrs_dir = run_user_dir(run)
     if not os.path.exists(attrs_dir):
         return {}
     return attr_log.get_attrs(attrs_dir)
 
 
+_PRELOAD_JSON = ("config", "summary", "user_attrs")
+
+
+def preload_run_attrs(run: Run, attrs: dict[str, Any]):
+    """Preloads run attributes that would otherwise be read from disk.
+
+    Supported names are the core attribute names along with "status",
+    "config", "summary", and "user_attrs". Values for "config",
+    "summary", and "user_attrs" are JSON encoded strings, which are
+    decoded when first read. A core attribute value of None indicates
+    that the attribute is not defined for the run.
+
+    Preloaded values are used by the run index to provide run
+    attributes without reading run files.
+    """
+    for name, val in attrs.items():
+        if name in _ATTR_READERS:
+            run._cache[f"_attr_{name}"] = _UNREAD if val is None else val
+        elif name == "status" or name in _PRELOAD_JSON:
+            run._cache[f"_preload_{name}"] = val
+        else:
+            raise ValueError(name)
+
+
+def apply_meta_record(run: Run, record: dict[str, Any]):
+    """Preloads run attributes from a run meta record.
+
+    See `run_meta.make_meta_record` for details on meta records.
+    """
+    timestamps = {
+        name: _record_timestamp(record, name)
+        for name in ("initialized", "staged", "started", "stopped")
+    }
+    preload_run_attrs(
+        run,
+        {
+            "exit_code": record.get("exit_code"),
+            "staged": timestamps["staged"],
+            "started": timestamps["started"],
+            "stopped": timestamps["stopped"],
+            "timestamp": (
+                timestamps["started"]
+                or timestamps["staged"]
+                or timestamps["initialized"]
+                or _run_id_timestamp(run)
+            ),
+            "config": record.get("config") or {},
+            "summary": record.get("summary") or {},
+        },
+    )
+
+
+def _record_timestamp(record: dict[str, Any], name: str):
+    return decode_run_timestamp(record.get(name))
+
+
+def clear_preloaded_attrs(run: Run, *names: str):
+    for name in names:
+        run._cache.pop(f"_preload_{name}", None)
+
+
+def _preloaded(run: Run, name: str):
+    cache_name = f"_preload_{name}"
+    val = run._cache[cache_name]
+    if name in _PRELOAD_JSON and isinstance(val, str):
+        run._cache[cache_name] = val = json.loads(val)
+    return val
+
+
 def run_user_dir(run: Run):
     return _run_other_dir(run, "user")
 
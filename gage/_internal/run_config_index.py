@@ -0,0 +1,173 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import logging
+import os
+import threading
+
+from . import run_meta
+
+from .opref_util import encode_opref
+
+__all__ = [
+    "CONFIG_INDEX_NAME",
+    "config_index_run_ids",
+    "delete_config_index",
+    "index_run_config",
+]
+
+log = logging.getLogger(__name__)
+
+CONFIG_INDEX_NAME = ".config-index"
+
+# The config index is an append-only log in a runs directory. Each line
+# is a run ID, the run config digest, and the encoded run opref. The
+# index is used to find runs with the same opref and config without
+# reading run config.
+#
+# The index is created when it's first read. Runs are added to the
+# index when their config is written (see `index_run_config()`). Runs
+# that are missing from the index (e.g. runs copied from another
+# system) are added when the index is first read by a process. Later
+# reads in the process don't list the runs directory unless the index
+# is deleted or replaced.
+#
+# Entries with a config digest from an earlier digest format are
+# ignored and their runs are indexed again.
+#
+# Index entries are candidates only and must be verified by the reader.
+
+IndexKey = tuple[str, str]  # (encoded opref, config digest)
+
+
+class _IndexState:
+    def __init__(self):
+        self.ino = -1
+        self.offset = 0
+        self.scanned = False
+        self.run_ids: set[str] = set()
+        self.entries: dict[IndexKey, list[str]] = {}
+
+
+__index_cache: dict[str, _IndexState] = {}
+__index_cache_lock = threading.Lock()
+
+
+def index_run_config(run: Run, digest: str):
+    """Adds a run config digest to the config index.
+
+    Does nothing if the runs directory doesn't have a config index.
+    """
+    root = os.path.dirname(run.meta_dir)
+    if not os.path.exists(os.path.join(root, CONFIG_INDEX_NAME)):
+        return
+    try:
+        opref = encode_opref(run.opref)
+    except ValueError:
+        return
+    _append_index(root, [(run.id, digest, opref)])
+
+
+def config_index_run_ids(root: str, opref: OpRef, digest: str) -> list[str]:
+    """Returns IDs of runs in root with opref and config digest.
+
+    Run IDs are in the order they were indexed.
+    """
+    try:
+        key = (encode_opref(opref), digest)
+    except ValueError:
+        return []
+    with __index_cache_lock:
+        state = _read_index(root)
+        if not state.scanned:
+            try:
+                names = os.listdir(root)
+            except FileNotFoundError:
+                return []
+            state = _index_missing_runs(root, names, state)
+            state.scanned = True
+        return list(state.entries.get(key, []))
+
+
+def delete_config_index(root: str):
+    """Deletes the config index in `root`.
+
+    The index is recreated as needed.
+    """
+    try:
+        os.remove(os.path.join(root, CONFIG_INDEX_NAME))
+    except FileNotFoundError:
+        pass
+
+
+def _read_index(root: str):
+    # Index is append-only - read lines added since last read
+    filename = os.path.join(root, CONFIG_INDEX_NAME)
+    state = __index_cache.get(root)
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        state = __index_cache[root] = _IndexState()
+        return state
+    if state is None or state.ino != st.st_ino or st.st_size < state.offset:
+        state = __index_cache[root] = _IndexState()
+        state.ino = st.st_ino
+    if st.st_size > state.offset:
+        with open(filename, "rb") as f:
+            f.seek(state.offset)
+            data = f.read()
+        # Only apply complete lines
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode().splitlines():
+            _apply_index_line(line, state)
+        state.offset += end
+    return state
+
+
+def _apply_index_line(line: str, state: _IndexState):
+    parts = line.split(" ", 2)
+    if len(parts) != 3:
+        return
+    run_id, digest, opref = parts
+    if not digest.startswith(run_meta.CONFIG_DIGEST_PREFIX):
+        return
+    state.run_ids.add(run_id)
+    state.entries.setdefault((opref, digest), []).append(run_id)
+
+
+def _index_missing_runs(root: str, names: list[str], state: _IndexState):
+    missing = []
+    for name in names:
+        run_id = run_meta.meta_run_id(name)
+        if run_id is None or run_id in state.run_ids:
+            continue
+        entry = _index_entry(os.path.join(root, name), run_id)
+        if entry:
+            missing.append(entry)
+    if not missing:
+        return state
+    log.debug("Adding %i run(s) to config index in %s", len(missing), root)
+    _append_index(root, missing)
+    return _read_index(root)
+
+
+def _index_entry(meta_dir: str, run_id: str):
+    try:
+        opref = run_meta.read_opref(meta_dir)
+        digest = run_meta.read_config_digest(meta_dir)
+        return run_id, digest, encode_opref(opref)
+    except (OSError, ValueError):
+        # Run without config or with invalid meta - don't index
+        return None
+
+
+def _append_index(root: str, entries: list[tuple[str, str, str]]):
+    lines = "".join([" ".join(entry) + "\n" for entry in entries])
+    try:
+        with open(os.path.join(root, CONFIG_INDEX_NAME), "a") as f:
+            f.write(lines)
+    except OSError as e:
+        log.debug("Error updating config index in %s: %s", root, e)
@@ -6,7 +6,13 @@ from .types import *
 
 from .run_attr import *
 
-__all__ = ["string_match_filter"]
+from .run_move import run_container
+
+__all__ = [
+    "WhereNode",
+    "string_match_filter",
+    "where_filter",
+]
 
 
 def string_match_filter(s: str) -> RunFilter:
@@ -51,3 +57,179 @@ def _match_tags(attrs: dict[str, Any], s: str):
 def _match_summary_attrs(run: Run, s: str):
     attrs = run_summary(run).get_run_attrs()
     return s in attrs.get("label", "")
+
+
+# =================================================================
+# Where expression filters
+# =================================================================
+
+# Where expressions are parsed by `lang.parse_where_expr()` into a
+# predicate tree, which is compiled to a run filter by `where_filter()`.
+# Tree nodes are tuples:
+#
+#   ("and", [node, ...])
+#   ("or", [node, ...])
+#   ("not", node)
+#   ("compare", attr, op, value)
+#   ("match", s)
+#
+# Terms are evaluated in order of cost so that terms that read run
+# files (e.g. config and summary) are only applied to runs that pass
+# cheaper terms (e.g. operation and status).
+
+WhereNode = tuple[Any, ...]
+
+_COST_RUN = 0  # Run object only
+_COST_META = 1  # Run meta, typically preloaded when listing runs
+_COST_SIDECAR = 2  # Run sidecar directory listing (move markers)
+_COST_FILES = 3  # Run files (config, summary, user attributes)
+
+_RUN_ATTRS = {
+    "op": (lambda run: run.opref.op_name, _COST_RUN),
+    "operation": (lambda run: run.opref.op_name, _COST_RUN),
+    "id": (lambda run: run.id, _COST_RUN),
+    "name": (lambda run: run.name, _COST_RUN),
+    "status": (run_status, _COST_META),
+    "container": (run_container, _COST_SIDECAR),
+    "label": (run_label, _COST_FILES),
+}
+
+_COMPARE_OPS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": lambda a, b: a == b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def where_filter(node: WhereNode) -> RunFilter:
+    """Returns a run filter for a where expression predicate tree."""
+    f, cost = _compile(node)
+    return f
+
+
+def _compile(node: WhereNode) -> tuple[RunFilter, int]:
+    match node:
+        case ("and", nodes):
+            return _compile_and(nodes)
+        case ("or", nodes):
+            return _compile_or(nodes)
+        case ("not", node):
+            return _compile_not(node)
+        case ("compare", attr, op, value):
+            return _compile_compare(attr, op, value)
+        case ("match", s):
+            return string_match_filter(s), _COST_FILES
+        case _:
+            raise ValueError(f"unexpected where node: {node!r}")
+
+
+def _compile_and(nodes: list[WhereNode]):
+    compiled = sorted([_compile(node) for node in nodes], key=lambda c: c[1])
+    filters = [f for f, cost in compiled]
+
+    def f(run: Run):
+        return all(filter(run) for filter in filters)
+
+    return f, compiled[-1][1]
+
+
+def _compile_or(nodes: list[WhereNode]):
+    compiled = sorted([_compile(node) for node in nodes], key=lambda c: c[1])
+    filters = [f for f, cost in compiled]
+
+    def f(run: Run):
+        return any(filter(run) for filter in filters)
+
+    return f, compiled[-1][1]
+
+
+def _compile_not(node: WhereNode):
+    compiled, cost = _compile(node)
+
+    def f(run: Run):
+        return not compiled(run)
+
+    return f, cost
+
+
+def _compile_compare(attr: str, op: str, value: Any):
+    try:
+        compare = _COMPARE_OPS[op]
+    except KeyError:
+        raise ValueError(f"unsupported operator {op!r}") from None
+    reader, cost = _attr_reader(attr)
+
+    if value is None:
+        return _compile_compare_null(op, reader), cost
+
+    def f(run: Run):
+        run_val = reader(run)
+        if run_val is None:
+            return False
+        try:
+            return compare(*_coerce_compare_vals(run_val, value))
+        except TypeError:
+            return False
+
+    return f, cost
+
+
+def _compile_compare_null(op: str, reader: Callable[[Run], Any]) -> RunFilter:
+    # null matches runs without the attribute
+    if op in ("=", "=="):
+        return lambda run: reader(run) is None
+    if op == "!=":
+        return lambda run: reader(run) is not None
+    return lambda run: False
+
+
+def _attr_reader(attr: str) -> tuple[Callable[[Run], Any], int]:
+    try:
+        return _RUN_ATTRS[attr]
+    except KeyError:
+        pass
+    prefix, sep, name = attr.partition(":")
+    if not sep or not name:
+        raise ValueError(f"unknown attribute {attr!r}")
+    match prefix:
+        case "config":
+            return (lambda run: run_config(run).get(name)), _COST_FILES
+        case "attribute":
+            return (
+                lambda run: _summary_val(run_summary(run).get_attributes(), name)
+            ), _COST_FILES
+        case "metric":
+            return (
+                lambda run: _summary_val(run_summary(run).get_metrics(), name)
+            ), _COST_FILES
+        case _:
+            raise ValueError(f"unknown attribute {attr!r}")
+
+
+def _summary_val(vals: dict[str, Any], name: str):
+    val = vals.get(name)
+    return val.get("value") if isinstance(val, dict) else val
+
+
+def _coerce_compare_vals(run_val: Any, val: Any):
+    if isinstance(val, bool) or isinstance(run_val, bool):
+        # Booleans match only booleans or their string forms
+        return _bool_str(run_val), _bool_str(val)
+    if isinstance(val, (int, float)) and isinstance(run_val, str):
+        try:
+            return float(run_val), val
+        except ValueError:
+            pass
+    elif isinstance(val, str) and isinstance(run_val, (int, float)):
+        return str(run_val), val
+    return run_val, val
+
+
+def _bool_str(val: Any):
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    return str(val).lower() if isinstance(val, str) else val
@@ -0,0 +1,312 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from . import util
+
+from .cache_util import delete_cache_db
+from .cache_util import is_racy
+from .cache_util import open_cache_db
+
+from .opref_util import decode_opref
+from .opref_util import encode_opref
+
+from .run_attr import clear_preloaded_attrs
+from .run_attr import decode_run_timestamp
+from .run_attr import encode_run_timestamp
+from .run_attr import prefetch_run_attrs
+from .run_attr import preload_run_attrs
+from .run_attr import run_attr
+from .run_attr import run_config
+from .run_attr import run_status
+from .run_attr import run_summary
+from .run_attr import run_user_attrs
+
+from .run_move import run_container
+
+from .run_util import run_for_meta_dir
+from .run_util import run_name_for_id
+
+__all__ = [
+    "INDEX_NAME",
+    "delete_index",
+    "indexed_runs",
+]
+
+log = logging.getLogger(__name__)
+
+INDEX_NAME = ".index.db"
+
+INDEX_SCHEMA = 2
+
+_TIMESTAMPS = ("staged", "started", "stopped", "timestamp")
+
+_COLS = (
+    "name",
+    "id",
+    "opref",
+    "container",
+    "move_sig",
+    "user_sig",
+    "status",
+    "exit_code",
+    "staged",
+    "started",
+    "stopped",
+    "timestamp",
+    "config",
+    "summary",
+    "user_attrs",
+)
+
+_CREATE_RUNS = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    name TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    opref TEXT NOT NULL,
+    container TEXT NOT NULL,
+    move_sig INTEGER,
+    user_sig INTEGER,
+    status TEXT,
+    exit_code INTEGER,
+    staged INTEGER,
+    started INTEGER,
+    stopped INTEGER,
+    timestamp INTEGER,
+    config TEXT,
+    summary TEXT,
+    user_attrs TEXT
+)
+"""
+
+_INSERT_RUN = (
+    f"INSERT OR REPLACE INTO runs ({', '.join(_COLS)}) "
+    f"VALUES ({', '.join(['?'] * len(_COLS))})"
+)
+
+IndexedRunContainer = tuple[Run, str]
+
+
+def indexed_runs(
+    root: str,
+    names: list[str],
+    prefetch: Sequence[str] = (),
+) -> list[IndexedRunContainer] | None:
+    """Returns a list of runs and their containers using a run index.
+
+    `names` is the list of names in `root`. `prefetch` is a list of
+    attributes to read for runs that aren't indexed.
+
+    The index is stored in `root` and is updated as needed to reflect
+    changes to runs. Only finalized runs (i.e. runs with zipped meta)
+    are indexed. Other runs are read from disk.
+
+    Returns None if the index cannot be used, in which case runs must be
+    read from disk.
+    """
+    if os.getenv("NO_RUN_INDEX") == "1":
+        return None
+    index_path = os.path.join(root, INDEX_NAME)
+    if not os.path.exists(index_path) and not any(
+        _is_zip_meta_name(name) for name in names
+    ):
+        # Nothing to index
+        return None
+    try:
+        db = open_cache_db(index_path, INDEX_SCHEMA, ["runs"], [_CREATE_RUNS])
+    except sqlite3.Error as e:
+        log.debug("Cannot use run index %s: %s", index_path, e)
+        return None
+    try:
+        return _sync_index(db, root, names, prefetch)
+    except sqlite3.Error as e:
+        log.debug("Error updating run index %s: %s", index_path, e)
+        return None
+    finally:
+        db.close()
+
+
+def delete_index(root: str):
+    """Deletes the run index in `root`."""
+    delete_cache_db(root, INDEX_NAME)
+
+
+def _is_zip_meta_name(name: str):
+    return name.endswith(".meta.zip")
+
+
+def _sync_index(
+    db: sqlite3.Connection,
+    root: str,
+    names: list[str],
+    prefetch: Sequence[str],
+):
+    # Runs are loaded without holding a write lock on the index so that
+    # other processes can use it. Index changes are applied in a single
+    # transaction once runs are loaded.
+    names_set = set(names)
+    rows = {row[0]: row for row in db.execute(f"SELECT {', '.join(_COLS)} FROM runs")}
+    stale = [(name,) for name in rows if name not in names_set]
+    now = time.time_ns()
+
+    def load(name: str):
+        if _is_zip_meta_name(name):
+            return _indexed_run(root, name, rows.get(name), names_set, now)
+        return _unindexed_run(root, name, prefetch), None
+
+    meta_names = [
+        name for name in names if _is_zip_meta_name(name) or name.endswith(".meta")
+    ]
+    updates: list[tuple[Any, ...]] = []
+    runs: list[IndexedRunContainer] = []
+    for indexed, update in util.io_map(load, meta_names):
+        if update:
+            updates.append(update)
+        if indexed:
+            runs.append(indexed)
+    if stale or updates:
+        try:
+            _write_index(db, stale, updates)
+        except sqlite3.Error as e:
+            log.debug("Error writing run index for %s: %s", root, e)
+    return runs
+
+
+def _write_index(
+    db: sqlite3.Connection,
+    stale: list[tuple[str]],
+    updates: list[tuple[Any, ...]],
+):
+    with db:
+        if stale:
+            db.executemany("DELETE FROM runs WHERE name = ?", stale)
+        if updates:
+            log.debug("Updating %i run(s) in run index", len(updates))
+            db.executemany(_INSERT_RUN, updates)
+
+
+def _unindexed_run(root: str, name: str, prefetch: Sequence[str]):
+    run = run_for_meta_dir(os.path.join(root, name))
+    if not run:
+        return None
+    prefetch_run_attrs(run, prefetch)
+    return run, run_container(run)
+
+
+def _indexed_run(
+    root: str,
+    name: str,
+    row: tuple[Any, ...] | None,
+    names: set[str],
+    now: int,
+) -> tuple[IndexedRunContainer | None, tuple[Any, ...] | None]:
+    if row is None:
+        run = run_for_meta_dir(os.path.join(root, name))
+        if not run:
+            return None, None
+        row = _init_row(run, name, names, now)
+        return (run, row[3]), row
+    run = _run_for_row(root, row)
+    move_sig = _sidecar_sig(run, "move", names)
+    user_sig = _sidecar_sig(run, "user", names)
+    if move_sig != row[4] or user_sig != row[5]:
+        row = _refresh_sidecar_fields(run, row, names, now)
+        return (run, row[3]), row
+    return (run, row[3]), None
+
+
+def _run_for_row(root: str, row: tuple[Any, ...]):
+    name, run_id, opref = row[:3]
+    meta_dir = os.path.join(root, name)
+    run = Run(
+        run_id, decode_opref(opref), meta_dir, meta_dir[:-9], run_name_for_id(run_id)
+    )
+    preload_run_attrs(
+        run,
+        {
+            "status": row[6],
+            "exit_code": row[7],
+            **{
+                name: decode_run_timestamp(val)
+                for name, val in zip(_TIMESTAMPS, row[8:12])
+            },
+            "config": row[12],
+            "summary": row[13],
+            "user_attrs": row[14],
+        },
+    )
+    return run
+
+
+def _init_row(run: Run, name: str, names: set[str], now: int):
+    status = run_status(run)
+    config = json.dumps(run_config(run))
+    summary = json.dumps(run_summary(run).as_json())
+    user_attrs = json.dumps(run_user_attrs(run))
+    preload_run_attrs(
+        run,
+        {
+            "status": status,
+            "config": config,
+            "summary": summary,
+            "user_attrs": user_attrs,
+        },
+    )
+    return (
+        name,
+        run.id,
+        encode_opref(run.opref),
+        run_container(run),
+        _trusted_sig(_sidecar_sig(run, "move", names), now),
+        _trusted_sig(_sidecar_sig(run, "user", names), now),
+        status,
+        run_attr(run, "exit_code", None),
+        *[encode_run_timestamp(run_attr(run, name, None)) for name in _TIMESTAMPS],
+        config,
+        summary,
+        user_attrs,
+    )
+
+
+def _refresh_sidecar_fields(run: Run, row: tuple[Any, ...], names: set[str], now: int):
+    clear_preloaded_attrs(run, "user_attrs")
+    user_attrs = json.dumps(run_user_attrs(run))
+    preload_run_attrs(run, {"user_attrs": user_attrs})
+    return (
+        *row[:3],
+        run_container(run),
+        _trusted_sig(_sidecar_sig(run, "move", names), now),
+        _trusted_sig(_sidecar_sig(run, "user", names), now),
+        *row[6:14],
+        user_attrs,
+    )
+
+
+def _sidecar_sig(run: Run, sidecar: str, names: set[str]):
+    """Returns a signature for a run sidecar directory.
+
+    The signature is 0 if the sidecar does not exist, otherwise it's the
+    modified time of the sidecar directory in nanoseconds.
+    """
+    name = f"{run.id}.{sidecar}"
+    if name not in names:
+        return 0
+    try:
+        return os.stat(os.path.join(os.path.dirname(run.meta_dir), name)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _trusted_sig(sig: int, now: int):
+    # Racy sidecar changes are re-read on the next index update
+    if sig and is_racy(sig, now):
+        return None
+    return sig
@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: Apache-2.0
+
+from typing import *
+
+from .types import *
+
+import logging
+import os
+import sys
+import uuid
+
+from .run_attr import encode_run_timestamp
+from .run_attr import run_attr
+
+__all__ = [
+    "LATEST_NAME",
+    "clear_latest_run",
+    "delete_latest_run",
+    "read_latest_run",
+    "run_timestamp_us",
+    "update_latest_run",
+    "write_latest_run",
+]
+
+log = logging.getLogger(__name__)
+
+LATEST_NAME = ".latest"
+
+# The latest run pointer is a file in a runs directory that contains
+# the timestamp (epoch microseconds) and ID of the latest active run in
+# the directory, where latest is determined by the run 'timestamp'
+# attribute.
+#
+# The pointer is created by `write_latest_run()`, typically after the
+# latest run is found by listing runs. Once created, the pointer is
+# updated as run timestamps are written. Changes that may affect the
+# latest run (e.g. deleting runs or moving runs out of the active
+# container) delete the pointer.
+#
+# The pointer is a hint and must be validated by the reader (see
+# `var.latest_run()`).
+#
+# Updates compare against the current pointer while holding an
+# exclusive lock on the runs directory so that concurrent runs can't
+# replace a later pointer with an earlier one. Where the lock isn't
+# available, the pointer is deleted rather than updated.
+
+
+def read_latest_run(root: str) -> tuple[int, str] | None:
+    """Returns the latest run pointer for `root`.
+
+    The pointer is a tuple of run timestamp in epoch microseconds and
+    run ID. Returns None if the pointer doesn't exist or is invalid.
+    """
+    try:
+        with open(os.path.join(root, LATEST_NAME)) as f:
+            s = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        log.debug("Error reading latest run pointer in %s: %s", root, e)
+        return None
+    try:
+        timestamp_str, run_id = s.split()
+        return int(timestamp_str), run_id
+    except ValueError:
+        log.debug("Invalid latest run pointer in %s: %r", root, s)
+        return None
+
+
+def write_latest_run(root: str, run: Run):
+    """Writes the latest run pointer for `root`."""
+    timestamp = run_timestamp_us(run)
+    if timestamp is None:
+        delete_latest_run(root)
+    else:
+        _write_pointer(root, timestamp, run.id)
+
+
+def run_timestamp_us(run: Run) -> int | None:
+    """Returns the run timestamp in epoch microseconds."""
+    return encode_run_timestamp(run_attr(run, "timestamp", None))
+
+
+def update_latest_run(run: Run, timestamp: int):
+    """Updates the latest run pointer for a new run timestamp.
+
+    `timestamp` is the run timestamp in epoch microseconds. The pointer
+    is updated if it exists and `timestamp` is not earlier than the
+    pointer timestamp.
+    """
+    root = os.path.dirname(run.meta_dir)
+
+    def update():
+        pointer = read_latest_run(root)
+        if not pointer or pointer[0] > timestamp:
+            return
+        _write_pointer(root, timestamp, run.id)
+
+    if not _locked(root, update):
+        delete_latest_run(root)
+
+
+def clear_latest_run(run: Run):
+    """Deletes the latest run pointer if it points to `run`."""
+    root = os.path.dirname(run.meta_dir)
+    pointer = read_latest_run(root)
+    if pointer and pointer[1] == run.id:
+        delete_latest_run(root)
+
+
+def delete_latest_run(root: str):
+    """Deletes the latest run pointer in `root`."""
+    try:
+        os.remove(os.path.join(root, LATEST_NAME))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        log.debug("Error deleting latest run pointer in %s: %s", root, e)
+
+
+def _locked(root: str, f: Callable[[], None]):
+    """Calls `f` while holding an exclusive lock on `root`.
+
+    Returns False if `root` can't be locked, in which case `f` is not
+    called.
+    """
+    if sys.platform == "win32":
+        return False
+    import fcntl
+
+    try:
+        fd = os.open(root, os.O_RDONLY)
+    except OSError as e:
+        log.debug("Error opening %s for lock: %s", root, e)
+        return False
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except OSError as e:
+            log.debug("Error locking %s: %s", root, e)
+            return False
+        f()
+        return True
+    finally:
+        os.close(fd)
+
+
+def _write_pointer(root: str, timestamp: int, run_id: str):
+    filename = os.path.join(root, LATEST_NAME)
+    tmp_filename = f"{filename}.{uuid.uuid4().hex}"
+    try:
+        with open(tmp_filename, "w") as f:
+            f.write(f"{timestamp} {run_id}\n")
+        os.replace(tmp_filename, filename)
+    except OSError as e:
+        log.debug("Error writing latest run pointer in %s: %s", root, e)
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
@@ -2,12 +2,16 @@
 
 from typing import *
 
+import hashlib
 import io
 import json
 import logging
 import os
+import threading
 import zipfile
 
+from collections import OrderedDict
+
 from .types import *
 
 from .run_output import *
@@ -19,18 +23,31 @@ from .file_util import make_dir
 from .opref_util import encode_opref
 from .opref_util import decode_opref
 
+from . import util
+
 __all__ = [
+    "CONFIG_DIGEST_PREFIX",
+    "META_RECORD",
+    "clear_meta_zip_cache",
+    "config_digest",
     "delete_proc_lock",
+    "delete_staged_digests",
     "is_zip",
+    "invalidate_meta_zip",
     "iter_output",
     "ls",
     "make_meta_dir",
+    "meta_run_id",
     "meta_file_exists",
     "open_files_log",
     "open_manifest",
     "open_meta_file",
+    "open_staged_digests",
     "read_config",
+    "read_config_digest",
     "read_opdef",
+    "make_meta_record",
+    "read_meta_record",
     "read_opref",
     "read_output",
     "read_proc_cmd",
@@ -42,6 +59,8 @@ __all__ = [
     "run_output_writer",
     "runner_log",
     "write_config",
+    "write_manifest",
+    "write_meta_record",
     "write_opdef",
     "write_opref",
     "write_patched",
@@ -110,6 +129,18 @@ def is_zip(meta_dir: str):
     return meta_dir.endswith(".zip") or meta_dir.endswith(".zip.deleted")
 
 
+def meta_run_id(name: str):
+    """Returns the run ID for a meta dir or zip name.
+
+    Returns None if `name` is not a meta dir or zip name.
+    """
+    if name.endswith(".meta"):
+        return name[:-5]
+    if name.endswith(".meta.zip"):
+        return name[:-9]
+    return None
+
+
 def _open_meta_dir_file(
     meta_dir: str,
     path: list[str] | tuple[str, ...],
@@ -126,30 +157,20 @@ def _open_meta_dir_file(
 
 
 def _open_meta_zip_file(filename: str, member: str, text: bool = True):
-    zf = zipfile.ZipFile(filename)
-    f = zf.open(member)
-    f.close = _zip_member_close_f(f, zf)
+    try:
+        f = _apply_meta_zip(filename, lambda zf: zf.open(member))
+    except KeyError:
+        raise FileNotFoundError(f"{filename}/{member}") from None
     return cast(IO[str], io.TextIOWrapper(f)) if text else f
 
 
-def _zip_member_close_f(f: IO[Any], zf: zipfile.ZipFile):
-    f_close = f.close
-
-    def close():
-        f_close()
-        zf.close()
-
-    return close
-
-
 def _meta_zip_file_exists(filename: str, member: str):
-    with zipfile.ZipFile(filename) as zf:
-        try:
-            zf.getinfo(member)
-        except KeyError:
-            return False
-        else:
-            return True
+    try:
+        _apply_meta_zip(filename, lambda zf: zf.getinfo(member))
+    except KeyError:
+        return False
+    else:
+        return True
 
 
 def ls(meta_dir: str):
@@ -160,8 +181,93 @@ def ls(meta_dir: str):
 
 
 def _ls_zip(filename: str):
-    with zipfile.ZipFile(filename) as zf:
-        return sorted(zf.namelist())
+    return sorted(_apply_meta_zip(filename, lambda zf: zf.namelist()))
+
+
+# =================================================================
+# Meta zip cache
+# =================================================================
+
+# Reading a zip member requires the zip central directory, which is
+# read each time a zip file is opened. To avoid reading the central
+# directory for each zipped meta read, open zip files are cached. The
+# cache is keyed by zip filename and validated using the file modified
+# time and size.
+#
+# Member streams remain readable after their zip file is closed (zip
+# files are reference counted by their open members) so zip files can
+# be evicted from the cache at any time.
+
+_META_ZIP_CACHE_SIZE = 64
+
+_meta_zip_cache: OrderedDict[str, tuple[tuple[int, int], zipfile.ZipFile]] = (
+    OrderedDict()
+)
+_meta_zip_cache_lock = threading.Lock()
+
+_T = TypeVar("_T")
+
+
+def _apply_meta_zip(filename: str, f: Callable[[zipfile.ZipFile], _T]) -> _T:
+    """Applies `f` to a zip file for `filename` and returns the result.
+
+    Uses a cached zip file when available. `f` is called with the cache
+    lock held and should not block.
+    """
+    max_size = _meta_zip_cache_size()
+    if max_size <= 0:
+        with zipfile.ZipFile(filename) as zf:
+            return f(zf)
+    st = os.stat(filename)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _meta_zip_cache_lock:
+        cached = _meta_zip_cache.get(filename)
+        if cached and cached[0] == sig:
+            _meta_zip_cache.move_to_end(filename)
+            return f(cached[1])
+    # Open zip file without holding lock
+    zf = zipfile.ZipFile(filename)
+    with _meta_zip_cache_lock:
+        cached = _meta_zip_cache.get(filename)
+        if cached and cached[0] == sig:
+            # Opened by another thread
+            zf.close()
+            zf = cached[1]
+        else:
+            if cached:
+                cached[1].close()
+            _meta_zip_cache[filename] = (sig, zf)
+        _meta_zip_cache.move_to_end(filename)
+        while len(_meta_zip_cache) > max_size:
+            _, (_, evicted) = _meta_zip_cache.popitem(last=False)
+            evicted.close()
+        return f(zf)
+
+
+def _meta_zip_cache_size() -> int:
+    size = util.try_env("GAGE_META_ZIP_CACHE", int)
+    return _META_ZIP_CACHE_SIZE if size is None else size
+
+
+def invalidate_meta_zip(meta_dir: str):
+    """Closes and removes a cached zip file for zipped run meta.
+
+    Call before deleting or replacing zipped run meta to release the
+    zip file handle.
+    """
+    with _meta_zip_cache_lock:
+        cached = _meta_zip_cache.pop(meta_dir, None)
+    if cached:
+        cached[1].close()
+
+
+def clear_meta_zip_cache():
+    """Closes and removes all cached zip files."""
+    with _meta_zip_cache_lock:
+        cached = list(_meta_zip_cache.values())
+        _meta_zip_cache.clear()
+    for _, zf in cached:
+        zf.close()
 
 
 # =================================================================
@@ -259,6 +365,61 @@ def _open_config(run: Run, write: bool = False):
 def write_config(run: Run, config: RunConfig):
     with _open_config(run, write=True) as f:
         json.dump(config, f, indent=2, sort_keys=True)
+    digest = config_digest(config)
+    with _open_meta_file(run.meta_dir, ["config.digest"], write=True) as f:
+        f.write(digest)
+    return digest
+
+
+# Config digests are prefixed with the version of the digest format.
+# Digests with another prefix (or without one) were computed using an
+# earlier format and must be recomputed from run config.
+CONFIG_DIGEST_PREFIX = "2:"
+
+
+def config_digest(config: RunConfig):
+    """Returns a digest for run config.
+
+    Config with the same keys and values have the same digest. Numbers
+    that compare as equal (e.g. 1 and 1.0) have the same digest.
+    """
+    encoded = json.dumps(
+        _normalize_digest_val(config), sort_keys=True, separators=(",", ":")
+    )
+    return CONFIG_DIGEST_PREFIX + hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _normalize_digest_val(val: Any) -> Any:
+    if isinstance(val, float) and val.is_integer():
+        return int(val)
+    if isinstance(val, dict):
+        return {key: _normalize_digest_val(item) for key, item in val.items()}
+    if isinstance(val, list):
+        return [_normalize_digest_val(item) for item in val]
+    return val
+
+
+def read_config_digest(run_or_meta_dir: Run | str):
+    """Returns the config digest for a run.
+
+    Computes the digest from run config for runs without a digest or
+    with a digest from an earlier format.
+    """
+    meta_dir = (
+        run_or_meta_dir
+        if isinstance(run_or_meta_dir, str)
+        else run_or_meta_dir.meta_dir
+    )
+    try:
+        with _open_meta_file(meta_dir, ["config.digest"]) as f:
+            digest = f.read().strip()
+    except FileNotFoundError:
+        pass
+    else:
+        if digest.startswith(CONFIG_DIGEST_PREFIX):
+            return digest
+    with _open_meta_file(meta_dir, ["config.json"]) as f:
+        return config_digest(json.load(f))
 
 
 # =================================================================
@@ -352,9 +513,9 @@ def _open_proc_lock(run: Run, write: bool = False):
     return _open_meta_dir_file(run.meta_dir, ["proc", "lock"], write)
 
 
-def write_proc_lock(run: Run, pid: int):
+def write_proc_lock(run: Run, pid: int, create_time: float | None = None):
     with _open_proc_lock(run, write=True) as f:
-        f.write(str(pid))
+        f.write(str(pid) if create_time is None else f"{pid} {create_time!r}")
 
 
 def delete_proc_lock(run: Run):
@@ -458,6 +619,117 @@ def _iter_dir_output(meta_dir: str):
         )
 
 
+# =================================================================
+# Meta record
+# =================================================================
+
+META_RECORD = "meta.json"
+
+META_RECORD_SCHEMA = 1
+
+_META_RECORD_TIMESTAMPS = ("initialized", "staged", "started", "stopped")
+
+
+def make_meta_record(meta_dir: str) -> dict[str, Any]:
+    """Returns a meta record for a run meta directory or zip file.
+
+    A meta record contains the run attributes needed to list a run. It's
+    stored in a finalized run meta zip so that these attributes can be
+    read at once rather than from separate zip members.
+    """
+    record: dict[str, Any] = {"schema": META_RECORD_SCHEMA}
+    record["id"] = _read_meta_text(meta_dir, ["id"])
+    record["opref"] = _read_meta_text(meta_dir, ["opref"])
+    record["config"] = _read_meta_json(meta_dir, ["config.json"])
+    record["summary"] = _read_meta_json(meta_dir, ["summary.json"])
+    record["exit_code"] = _read_meta_int(meta_dir, ["proc", "exit"])
+    for name in _META_RECORD_TIMESTAMPS:
+        record[name] = _read_meta_int(meta_dir, [name])
+    return record
+
+
+def _read_meta_text(meta_dir: str, path: list[str]):
+    try:
+        with _open_meta_file(meta_dir, path) as f:
+            return f.read().rstrip()
+    except FileNotFoundError:
+        return None
+
+
+def _read_meta_json(meta_dir: str, path: list[str]):
+    try:
+        with _open_meta_file(meta_dir, path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _read_meta_int(meta_dir: str, path: list[str]):
+    s = _read_meta_text(meta_dir, path)
+    if s is None:
+        return None
+    try:
+        return int(s)
+    except ValueError:
+        log.warning("Invalid value for %s in \"%s\": %s", "/".join(path), meta_dir, s)
+        return None
+
+
+def read_meta_record(meta_dir: str) -> dict[str, Any] | None:
+    """Returns the meta record for zipped run meta.
+
+    Returns None if `meta_dir` is not a zip file or if the zip file
+    does not contain a meta record with the current schema.
+    """
+    if not is_zip(meta_dir):
+        return None
+    try:
+        with _open_meta_zip_file(meta_dir, META_RECORD, text=False) as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    record = json.loads(data)
+    if record.get("schema") != META_RECORD_SCHEMA:
+        return None
+    return record
+
+
+def write_meta_record(meta_dir: str):
+    """Writes a meta record to zipped run meta.
+
+    Used to add records to meta zip files that were created without
+    one. The zip file is replaced with a copy containing the record.
+
+    Returns True if the record was written or False if the zip file
+    already contains a record with the current schema.
+    """
+    if not is_zip(meta_dir):
+        raise ValueError(f"{meta_dir} is not a zip file")
+    if read_meta_record(meta_dir) is not None:
+        return False
+    record = make_meta_record(meta_dir)
+    _replace_zip_member(meta_dir, META_RECORD, json.dumps(record, sort_keys=True))
+    return True
+
+
+def _replace_zip_member(filename: str, member: str, data: str | bytes):
+    # Zip members can't be replaced in place - replace the zip file with
+    # a copy containing the new member
+    tmp_filename = filename + ".tmp"
+    try:
+        with zipfile.ZipFile(filename) as src:
+            with zipfile.ZipFile(tmp_filename, "w") as dest:
+                for info in src.infolist():
+                    if info.filename != member:
+                        dest.writestr(info, src.read(info))
+                dest.writestr(member, data)
+        invalidate_meta_zip(filename)
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
 # =================================================================
 # Runner log
 # =================================================================
@@ -513,6 +785,41 @@ def open_manifest(run: Run, write: bool = False, append: bool = False):
     return _open_meta_file(run.meta_dir, ["manifest"], write=write, append=append)
 
 
+def write_manifest(run: Run, data: str):
+    """Replaces the manifest for a run.
+
+    Unlike `open_manifest()`, supports zipped run meta.
+    """
+    if is_zip(run.meta_dir):
+        _replace_zip_member(run.meta_dir, "manifest", data)
+    else:
+        with open_manifest(run, write=True) as f:
+            f.write(data)
+
+
+# =================================================================
+# Staged digests
+# =================================================================
+
+# Staged digests are file digests computed while a run is staged. Each
+# digest is stored with the file size and modified time so it can be
+# reused when the file is unchanged. Staged digests are deleted when
+# the run is finalized.
+
+
+def open_staged_digests(run: Run, write: bool = False):
+    return _open_meta_file(run.meta_dir, ["staged-digests"], write=write)
+
+
+def delete_staged_digests(run: Run):
+    if is_zip(run.meta_dir):
+        raise ValueError("cannot delete from zip")
+    try:
+        os.remove(os.path.join(run.meta_dir, "staged-digests"))
+    except FileNotFoundError:
+        pass
+
+
 # =================================================================
 # Patched
 # =================================================================
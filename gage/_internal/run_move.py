@@ -4,31 +4,65 @@ from typing import *
 
 from .types import *
 
+import logging
 import os
 import threading
 import time
 
 import ulid
 
+from .cache_util import is_racy
+
 from .file_util import ensure_dir
 from .file_util import touch
 
+from .run_meta import meta_run_id
+
 __all__ = [
     "ACTIVE_CONTAINER",
+    "CONTAINER_INDEX_NAME",
+    "container_run_counts",
+    "delete_container_index",
     "log_run_move",
     "make_move_id",
+    "run_containers",
     "run_move_dir",
     "run_container",
 ]
 
+log = logging.getLogger(__name__)
+
 ACTIVE_CONTAINER = "active"
 
+CONTAINER_INDEX_NAME = ".containers"
+
+# The container index is an append-only log in a runs directory. Each
+# line is a run ID and the container the run was moved to. The last
+# line for a run ID is the run's current container. Runs without a line
+# are active.
+#
+# The index is created when runs are listed and the runs directory
+# contains moved runs. Once created, it's appended to as runs
+# are moved. Moved runs that are missing from the index (e.g. runs
+# copied from another system) are read from their move markers and
+# appended when the index is read.
+#
+# Index lines for moved runs may include a signature for the run move
+# directory (its modified time in nanoseconds). Move markers may change
+# outside `log_run_move()` (e.g. when sidecar directories are synced
+# from another system). A move directory whose signature differs from
+# its last index line, or that has no signature, is re-read when the
+# index is read and any changed container or signature is appended.
+
 
 def log_run_move(run: Run, container: str):
     move_dir = run_move_dir(run)
     ensure_dir(move_dir)
     marker = os.path.join(move_dir, f"{make_move_id()}-{container}")
     touch(marker)
+    root = os.path.dirname(run.meta_dir)
+    if os.path.exists(os.path.join(root, CONTAINER_INDEX_NAME)):
+        _append_container_index(root, [(run.id, container, None)])
     return marker
 
 
@@ -56,7 +90,10 @@ def make_move_id(timestamp_ms: int = 0):
 
 
 def run_container(run: Run):
-    move_dir = run_move_dir(run)
+    return _container_for_move_dir(run_move_dir(run))
+
+
+def _container_for_move_dir(move_dir: str):
     try:
         names = os.listdir(move_dir)
     except FileNotFoundError:
@@ -74,3 +111,126 @@ def _container_for_marker(name: str):
     if len(name) < 37:
         raise ValueError(f"Unexpected run move marker file: {name}")
     return name[37:]
+
+
+def run_containers(
+    root: str,
+    names: list[str] | None = None,
+    update_index: bool = True,
+) -> dict[str, str]:
+    """Returns a dict of run IDs to containers for moved runs in `root`.
+
+    Runs that aren't in the dict are active. `names` is the list of
+    names in `root` and is read if not specified.
+
+    Uses the container index in `root`, creating or updating it as
+    needed unless `update_index` is False.
+    """
+    if names is None:
+        try:
+            names = os.listdir(root)
+        except FileNotFoundError:
+            return {}
+    moved_ids = [name[:-5] for name in names if name.endswith(".move")]
+    index_exists = CONTAINER_INDEX_NAME in names
+    if not moved_ids and not index_exists:
+        # Nothing to index
+        return {}
+    index = _read_container_index(root) if index_exists else {}
+    now = time.time_ns()
+    updates: list[tuple[str, str, int | None]] = []
+    for run_id in moved_ids:
+        move_dir = os.path.join(root, f"{run_id}.move")
+        sig = _move_dir_sig(move_dir)
+        cur_container, cur_sig = index.get(run_id, (None, None))
+        if sig is not None and sig == cur_sig:
+            continue
+        container = _container_for_move_dir(move_dir)
+        trusted_sig = _trusted_sig(sig, now)
+        if container != cur_container or trusted_sig != cur_sig:
+            updates.append((run_id, container, trusted_sig))
+    if updates:
+        if update_index:
+            log.debug("Updating %i run(s) in container index in %s", len(updates), root)
+            _append_container_index(root, updates)
+        index.update((run_id, (container, sig)) for run_id, container, sig in updates)
+    return {run_id: container for run_id, (container, _) in index.items()}
+
+
+def _move_dir_sig(move_dir: str):
+    try:
+        return os.stat(move_dir).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _trusted_sig(sig: int | None, now: int):
+    # Racy move dir changes are re-read on the next index read
+    if sig is not None and is_racy(sig, now):
+        return None
+    return sig
+
+
+def container_run_counts(root: str) -> dict[str, int]:
+    """Returns a dict of containers to run counts for `root`.
+
+    Containers without runs are not included.
+    """
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return {}
+    run_ids = {meta_run_id(name) for name in names} - {None}
+    counts: dict[str, int] = {}
+    for run_id, container in run_containers(root, names).items():
+        if run_id in run_ids and container != ACTIVE_CONTAINER:
+            counts[container] = counts.get(container, 0) + 1
+    active = len(run_ids) - sum(counts.values())
+    if active:
+        counts[ACTIVE_CONTAINER] = active
+    return counts
+
+
+def delete_container_index(root: str):
+    """Deletes the container index in `root`.
+
+    The index is recreated as needed.
+    """
+    try:
+        os.remove(os.path.join(root, CONTAINER_INDEX_NAME))
+    except FileNotFoundError:
+        pass
+
+
+def _read_container_index(root: str):
+    index: dict[str, tuple[str, int | None]] = {}
+    try:
+        f = open(os.path.join(root, CONTAINER_INDEX_NAME))
+    except FileNotFoundError:
+        return index
+    with f:
+        for line in f:
+            parts = line.rstrip("\n").split(" ")
+            if len(parts) == 2 and parts[1]:
+                index[parts[0]] = (parts[1], None)
+            elif len(parts) == 3 and parts[1] and parts[2].isdigit():
+                index[parts[0]] = (parts[1], int(parts[2]))
+    return index
+
+
+def _append_container_index(root: str, entries: list[tuple[str, str, int | None]]):
+    lines = "".join(
+        [
+            (
+                f"{run_id} {container}\n"
+                if sig is None
+                else f"{run_id} {container} {sig}\n"
+            )
+            for run_id, container, sig in entries
+        ]
+    )
+    try:
+        with open(os.path.join(root, CONTAINER_INDEX_NAME), "a") as f:
+            f.write(lines)
+    except OSError as e:
+        log.debug("Error updating container index in %s: %s", root, e)
@@ -4,16 +4,29 @@ from typing import *
 
 from .types import *
 
+import os
 import re
 
 from .run_attr import run_config
 from .run_attr import run_status
 
+from .run_config_index import config_index_run_ids
+
+from .run_meta import config_digest
+
+from .run_move import ACTIVE_CONTAINER
+from .run_move import run_container
+
+from .run_util import run_for_meta_dir
+
 from .util import find_apply
-from .var import list_runs
+
+from .var import runs_dir
+from .var import sort_runs
 
 __all__ = [
     "find_comparable_run",
+    "is_prefix_spec",
     "select_runs",
 ]
 
@@ -79,20 +92,58 @@ def _slice_end(s: str | None):
     return int(s)
 
 
+def is_prefix_spec(spec: str):
+    """Returns True if spec can only select runs by ID or name prefix.
+
+    Prefix specs don't depend on run order. Integer specs are not
+    prefix specs because they're used as indexes when in range.
+    """
+    try:
+        int(spec)
+    except ValueError:
+        pass
+    else:
+        return False
+    try:
+        _parse_slice(spec)
+    except ValueError:
+        return True
+    else:
+        return False
+
+
 def _select_id_or_name(runs: list[Run], spec: str):
     return [run for run in runs if run.id.startswith(spec) or run.name.startswith(spec)]
 
 
-def find_comparable_run(opref: OpRef, config: RunConfig):
+def find_comparable_run(opref: OpRef, config: RunConfig, root: str | None = None):
+    """Returns the latest comparable run or None if one doesn't exist.
+
+    A comparable run is an active run with the same opref and config
+    that didn't fail with an error. Candidates are found using the
+    runs directory config index.
+    """
+    root = root or runs_dir()
+    run_ids = config_index_run_ids(root, opref, config_digest(config))
+    candidates = [run for run in map(_run_for_id(root), run_ids) if run]
+
     def check_run(run: Run):
         # Check attrs in order of least-to-most expensive
         if run.opref != opref:
             return False
+        if run_container(run) != ACTIVE_CONTAINER:
+            return False
         if run_status(run) == "error":
             return False
         return run_config(run) == config
 
-    try:
-        return next(iter(list_runs(sort=["-timestamp"], filter=check_run)))
-    except StopIteration:
-        return None
+    comparable = [run for run in candidates if check_run(run)]
+    return next(iter(sort_runs(comparable, ["-timestamp"], limit=1)), None)
+
+
+def _run_for_id(root: str):
+    def f(run_id: str):
+        meta_dir = os.path.join(root, f"{run_id}.meta")
+        return run_for_meta_dir(meta_dir) or run_for_meta_dir(f"{meta_dir}.zip")
+
+    return f
@@ -28,16 +28,34 @@ from . import run_sourcecode
 from . import run_output
 from . import shlex_util
 
+from .file_select import FileCopyHandler
 from .file_select import copy_files
 
+from .file_util import copy_file_sha256
 from .file_util import ensure_dir
+from .file_util import file_fingerprint
 from .file_util import file_sha256
+from .file_util import is_fingerprint
 from .file_util import is_readonly
 from .file_util import ls
 from .file_util import make_dir
+from .file_util import parse_file_size
 from .file_util import safe_delete_tree
 from .file_util import set_readonly
 
+from .hash_cache import cached_file_digests
+
+from .object_store import link_object
+from .object_store import object_store_enabled
+
+from .opref_util import decode_opref
+
+from .run_config_index import index_run_config
+
+from .run_latest import update_latest_run
+
+from .run_attr import apply_meta_record
+from .run_attr import clear_preloaded_attrs
 from .run_attr import run_project_ref
 from .run_attr import run_user_dir
 
@@ -45,6 +63,10 @@ from .progress_util import progress_parser
 from .project_util import load_project_data
 from .sys_config import get_user
 
+from .util import hash_workers
+from .util import io_map
+from .util import process_create_time
+
 __all__ = [
     "META_SCHEMA",
     "OutputName",
@@ -54,17 +76,20 @@ __all__ = [
     "RunManifestEntry",
     "apply_config",
     "associate_project",
+    "fill_manifest_digests",
     "finalize_run",
     "finalize_staged_run",
     "format_run_timestamp",
     "init_run_meta",
     "init_run_user_attrs",
     "log_user_attrs",
+    "is_time_ordered_id",
     "make_run_id",
     "make_run_timestamp",
     "make_run",
     "remove_associate_project",
     "run_for_meta_dir",
+    "run_id_time",
     "run_name_for_id",
     "run_phase_channel",
     "stage_dependencies",
@@ -88,14 +113,22 @@ run_phase_channel = channel.Channel()
 
 def run_for_meta_dir(meta_dir: str):
     try:
-        opref = run_meta.read_opref(meta_dir)
+        record = run_meta.read_meta_record(meta_dir)
+        opref = (
+            decode_opref(record["opref"])
+            if record and record.get("opref")
+            else run_meta.read_opref(meta_dir)
+        )
     except (OSError, ValueError):
         return None
     else:
         run_dir = _run_dir_for_meta_dir(meta_dir)
         run_id = _run_id_for_meta_dir(meta_dir)
         run_name = run_name_for_id(run_id)
-        return Run(run_id, opref, meta_dir, run_dir, run_name)
+        run = Run(run_id, opref, meta_dir, run_dir, run_name)
+        if record:
+            apply_meta_record(run, record)
+        return run
 
 
 def _run_id_for_meta_dir(meta_dir: str):
@@ -144,18 +177,60 @@ def make_run(opref: OpRef, location: str, id: str | None = None):
     meta_dir = run_meta.make_meta_dir(run_dir)
     run_meta.write_opref(meta_dir, opref)
     run_name = run_name_for_id(run_id)
-    return Run(run_id, opref, meta_dir, run_dir, run_name)
+    run = Run(run_id, opref, meta_dir, run_dir, run_name)
+    id_time = run_id_time(run_id)
+    if id_time is not None:
+        update_latest_run(run, id_time * 1000)
+    return run
 
 
 def make_run_id(_id_time: int = 0):
-    if _id_time > 0:
-        import ulid
+    """Returns a new time-ordered run ID.
+
+    Run IDs use the UUID layout with version 7: the first 48 bits are
+    the epoch time in milliseconds followed by random bits. IDs sort
+    in the order they're created (to the millisecond).
+
+    `_id_time` may be used to specify the ID time in milliseconds.
+    """
+    timestamp_ms = _id_time if _id_time > 0 else time.time_ns() // 1000000
+    n = (timestamp_ms & 0xFFFFFFFFFFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    n = (n & ~(0xF << 76)) | (0x7 << 76)  # version
+    n = (n & ~(0x3 << 62)) | (0x2 << 62)  # variant
+    return str(uuid.UUID(int=n))
 
-        return str(ulid.ULID.from_timestamp(_id_time).to_uuid4())
-    return str(uuid.uuid4())
+
+def is_time_ordered_id(run_id: str):
+    """Returns True if run_id is a time-ordered run ID.
+
+    Runs created by earlier versions of Gage use random (version 4)
+    UUIDs, which are not time-ordered.
+    """
+    return len(run_id) == 36 and run_id[14] == "7" and run_id[8] == "-"
+
+
+def run_id_time(run_id: str):
+    """Returns the time in epoch milliseconds for a time-ordered run ID.
+
+    Returns None if run_id is not time-ordered.
+    """
+    if not is_time_ordered_id(run_id):
+        return None
+    try:
+        return int(run_id[:8] + run_id[9:13], 16)
+    except ValueError:
+        return None
 
 
 def run_name_for_id(run_id: str) -> str:
+    """Returns the run name for a run ID.
+
+    The name is generated from the first 8 chars of the run ID. For
+    time-ordered IDs, which start with a timestamp, the name is
+    generated from the last 8 chars.
+    """
+    if is_time_ordered_id(run_id):
+        return uint2quint(int(run_id[-8:], 16))
     return uint2quint(int(run_id[:8], 16))
 
 
@@ -217,7 +292,8 @@ def _write_opdef(opdef: OpDef, run: Run, log: Logger):
 
 def _write_config(config: RunConfig, run: Run, log: Logger):
     log.info("Writing meta config")
-    run_meta.write_config(run, config)
+    digest = run_meta.write_config(run, config)
+    index_run_config(run, digest)
 
 
 def _write_proc_cmd(args: CmdArgs, run: Run, log: Logger):
@@ -288,6 +364,7 @@ def log_user_attrs(run: Run, set: dict[str, Any], delete: list[str] | None = Non
             return
         make_dir(attrs_dir)
     attr_log.log_attrs(attrs_dir, get_user(), set, delete)
+    clear_preloaded_attrs(run, "user_attrs")
 
 
 # =================================================================
@@ -324,7 +401,25 @@ def stage_sourcecode(run: Run, project_dir: str, _log_files: bool = True):
 def _copy_sourcecode(run: Run, project_dir: str, opdef: OpDef, log: Logger):
     sourcecode = run_sourcecode.init(project_dir, opdef)
     log.info(f"Copying source code (see log/files): {sourcecode.patterns}")
-    copy_files(project_dir, run.run_dir, sourcecode.paths)
+    handler = _DigestCopyHandler()
+    copy_files(project_dir, run.run_dir, sourcecode.paths, handler=handler)
+    _write_staged_digests(
+        run,
+        {
+            os.path.relpath(filename, run.run_dir): digest
+            for filename, digest in handler.digests.items()
+        },
+    )
+
+
+class _DigestCopyHandler(FileCopyHandler):
+    """Copy handler that computes file digests as files are copied."""
+
+    def __init__(self):
+        self.digests: dict[str, str] = {}
+
+    def copy_file(self, src_filename: str, dest_filename: str):
+        self.digests[dest_filename] = copy_file_sha256(src_filename, dest_filename)
 
 
 def _stage_sourcecode_hook(run: Run, project_dir: str, opdef: OpDef, log: Logger):
@@ -423,14 +518,28 @@ def finalize_staged_run(run: Run):
 
 def _write_staged_files_manifest(run: Run, log: Logger):
     log.info("Finalizing staged files (see manifest)")
+    files = _manifest_files(run)
+    for type, path, filename in files:
+        if not os.path.islink(filename):
+            set_readonly(filename)
+    digests = _run_file_digests(run, files, _read_staged_digests(run))
+    # Staged files aren't linked to the object store until the run is
+    # finalized - read-only mode doesn't prevent a privileged run
+    # process from writing to a file shared with other runs
     m = RunManifest(run, "w")
     with m:
-        for type, path in _reduce_files_log(run):
-            filename = os.path.join(run.run_dir, path)
-            if not os.path.islink(filename):
-                set_readonly(filename)
-            digest = file_sha256(filename)
+        for (type, path, filename), digest in zip(files, digests):
             m.add(type, digest, path)
+    # Staged digests are used to avoid rehashing unchanged files when
+    # the run is finalized
+    _write_staged_digests(
+        run, {path: digest for (type, path, filename), digest in zip(files, digests)}
+    )
+
+
+def _object_store_root(run: Run):
+    # Read-only run files are linked to the object store in the runs dir
+    return os.path.dirname(run.meta_dir) if object_store_enabled() else None
 
 
 def _reduce_files_log(run: Run):
@@ -496,7 +605,7 @@ def finalize_run(run: Run, exit_code: int = 0):
         _write_exit_code(exit_code, run, log)
         _finalize_run_hook(run, opdef, log)
         _apply_to_files_log(run, "g")
-        _write_run_files_manifest(run, log)
+        _write_run_files_manifest(run, opdef, log)
     if os.getenv("NO_ZIP_META") != "1":
         zip_filename = _zip_meta(run)
         return run_for_meta_dir(zip_filename)
@@ -629,18 +738,36 @@ def _finalize_run_hook(run: Run, opdef: OpDef, log: Logger):
     )
 
 
-def _write_run_files_manifest(run: Run, log: Logger):
+def _write_run_files_manifest(run: Run, opdef: OpDef, log: Logger):
     log.info("Finalizing run files (see manifest)")
     index = _init_manifest_index(run)
+    store_root = _object_store_root(run)
+    files = _manifest_files(run)
+    for type, path, filename in files:
+        if not is_readonly(filename) and not os.path.islink(filename):
+            set_readonly(filename)
+    digests = _run_file_digests(
+        run, files, _read_staged_digests(run), _fingerprint_size(opdef, log)
+    )
     m = RunManifest(run, "w")
     with m:
-        for type, path in _reduce_files_log(run):
-            filename = os.path.join(run.run_dir, path)
-            if not is_readonly(filename) and not os.path.islink(filename):
-                set_readonly(filename)
-            digest = file_sha256(filename)
+        for (type, path, filename), digest in zip(files, digests):
             _maybe_log_file_changed(path, digest, index, log)
+            if store_root and not is_fingerprint(digest):
+                link_object(store_root, filename, digest)
             m.add(type, digest, path)
+    run_meta.delete_staged_digests(run)
+
+
+def _fingerprint_size(opdef: OpDef, log: Logger):
+    val = opdef.get_manifest().get_fingerprint_size()
+    if val is None:
+        return None
+    try:
+        return parse_file_size(val)
+    except (TypeError, ValueError):
+        log.warning(f"Invalid manifest fingerprint-size {val!r}, ignoring")
+        return None
 
 
 def _maybe_log_file_changed(
@@ -667,9 +794,11 @@ def _zip_meta(run: Run):
 def _make_meta_zip(run: Run):
     files = ls(run.meta_dir, followlinks=True, include_dirs=True)
     filename = _meta_zip_filename(run)
+    record = run_meta.make_meta_record(run.meta_dir)
     with zipfile.ZipFile(filename, "x") as zf:
         for path in files:
             zf.write(os.path.join(run.meta_dir, path), path)
+        zf.writestr(run_meta.META_RECORD, json.dumps(record, sort_keys=True))
     return filename
 
 
@@ -697,8 +826,11 @@ RunFileType = Literal[
 
 def _write_timestamp(name: RunTimestamp, run: Run, log: Logger):
     log.info(f"Writing meta {name}")
+    timestamp = make_run_timestamp()
     with run_meta.open_meta_file(run, name, write=True) as f:
-        f.write(str(make_run_timestamp()))
+        f.write(str(timestamp))
+    if name != "stopped":
+        update_latest_run(run, timestamp)
 
 
 def _apply_to_files_log(run: Run, type: RunFileType):
@@ -847,6 +979,187 @@ def _decode_run_manifest_entry(entry: str) -> RunManifestEntry:
     return RunManifestEntry(cast(RunFileType, parts[0]), parts[1], parts[2])
 
 
+class _StagedDigest(NamedTuple):
+    digest: str
+    size: int
+    mtime_ns: int
+
+
+def _write_staged_digests(run: Run, digests: dict[str, str]):
+    with run_meta.open_staged_digests(run, write=True) as f:
+        for path, digest in digests.items():
+            try:
+                st = os.stat(os.path.join(run.run_dir, path))
+            except OSError:
+                continue
+            f.write(f"{digest} {st.st_size} {st.st_mtime_ns} {path}\n")
+
+
+def _read_staged_digests(run: Run) -> dict[str, _StagedDigest]:
+    try:
+        f = run_meta.open_staged_digests(run)
+    except FileNotFoundError:
+        return {}
+    digests: dict[str, _StagedDigest] = {}
+    with f:
+        # Files modified in the same file system time tick as the staged
+        # digests were written can change again without changing their
+        # modified time. As with racy Git index entries, don't trust
+        # staged digests for these files.
+        try:
+            staged_mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        except OSError:
+            return {}
+        for line in f:
+            parts = line.rstrip("\n").split(" ", 3)
+            if len(parts) != 4:
+                continue
+            digest, size, mtime_ns, path = parts
+            try:
+                staged = _StagedDigest(digest, int(size), int(mtime_ns))
+            except ValueError:
+                continue
+            if staged.mtime_ns < staged_mtime_ns:
+                digests[path] = staged
+    return digests
+
+
+def _run_file_digest(
+    filename: str,
+    staged: _StagedDigest | None,
+    fingerprint_size: int | None = None,
+):
+    """Returns a staged digest or a fingerprint for a run file.
+
+    Uses the staged digest for the file if the file size and modified
+    time are unchanged since the digest was staged.
+
+    If `fingerprint_size` is specified, returns a fingerprint rather
+    than a digest for files of at least that size. Use
+    `fill_manifest_digests()` to replace fingerprints with digests.
+
+    Returns None if the file digest must be computed.
+    """
+    if staged or fingerprint_size is not None:
+        try:
+            st = os.stat(filename)
+        except OSError:
+            pass
+        else:
+            if (
+                staged
+                and st.st_size == staged.size
+                and st.st_mtime_ns == staged.mtime_ns
+            ):
+                return staged.digest
+            if fingerprint_size is not None and st.st_size >= fingerprint_size:
+                return file_fingerprint(filename)
+    return None
+
+
+def _manifest_files(run: Run):
+    return [
+        (type, path, os.path.join(run.run_dir, path))
+        for type, path in _reduce_files_log(run)
+    ]
+
+
+def _run_file_digests(
+    run: Run,
+    files: list[tuple[RunFileType, str, str]],
+    staged: dict[str, _StagedDigest],
+    fingerprint_size: int | None = None,
+) -> list[str]:
+    """Returns digests for manifest files in the order of files.
+
+    Digests are computed concurrently using `hash_workers()` threads
+    and are cached in the run's runs directory.
+
+    `fingerprint_size` applies only to generated files.
+    """
+    digests = io_map(
+        lambda file: _run_file_digest(
+            file[2],
+            staged.get(file[1]),
+            fingerprint_size if file[0] == "g" else None,
+        ),
+        files,
+        hash_workers(),
+    )
+    pending = [i for i, digest in enumerate(digests) if digest is None]
+    computed = cached_file_digests(
+        os.path.dirname(run.meta_dir),
+        [files[i][2] for i in pending],
+        _file_sha256s,
+    )
+    for i, digest in zip(pending, computed):
+        digests[i] = digest
+    return cast(list[str], digests)
+
+
+def _file_sha256s(filenames: list[str]):
+    return io_map(file_sha256, filenames, hash_workers())
+
+
+def fill_manifest_digests(run: Run):
+    """Replaces fingerprints in a run manifest with file digests.
+
+    Fingerprints for files that are missing or that have changed since
+    they were recorded are not replaced.
+
+    Returns the number of replaced fingerprints.
+    """
+    with RunManifest(run) as m:
+        entries = list(m)
+    pending = [
+        (i, os.path.join(run.run_dir, entry.path))
+        for i, entry in enumerate(entries)
+        if is_fingerprint(entry.digest)
+    ]
+    if not pending:
+        return 0
+    # Verify fingerprints before computing digests to look up the
+    # verified files in the hash cache with a single call
+    matches = io_map(
+        lambda item: _fingerprint_matches(item[1], entries[item[0]].digest),
+        pending,
+        hash_workers(),
+    )
+    verified = [item for item, match in zip(pending, matches) if match]
+    if not verified:
+        return 0
+    try:
+        digests = cached_file_digests(
+            os.path.dirname(run.meta_dir),
+            [filename for _, filename in verified],
+            _file_sha256s,
+        )
+    except OSError as e:
+        log.warning("Cannot compute digests for %s: %s", run.run_dir, e)
+        return 0
+    store_root = _object_store_root(run)
+    for (i, filename), digest in zip(verified, digests):
+        if store_root:
+            link_object(store_root, filename, digest)
+        entries[i] = entries[i]._replace(digest=digest)
+    run_meta.write_manifest(
+        run,
+        "".join([_encode_run_manifest_entry(*entry) for entry in entries]),
+    )
+    return len(verified)
+
+
+def _fingerprint_matches(filename: str, fingerprint: str):
+    try:
+        if file_fingerprint(filename) != fingerprint:
+            log.warning("%s changed since it was fingerprinted, skipping", filename)
+            return False
+        return True
+    except OSError as e:
+        log.warning("Cannot compute digest for %s: %s", filename, e)
+        return False
+
+
 def _init_manifest_index(run: Run) -> dict[str, str]:
     index = {}
     with RunManifest(run) as m:
@@ -960,7 +1273,7 @@ def _hook_env(run: Run, project_dir: str | None = None):
 
 def _write_proc_lock(proc: subprocess.Popen[bytes], run: Run, log: Logger):
     log.info("Writing meta proc/lock")
-    run_meta.write_proc_lock(run, proc.pid)
+    run_meta.write_proc_lock(run, proc.pid, process_create_time(proc.pid))
 
 
 def _delete_proc_lock(run: Run, log: Logger):
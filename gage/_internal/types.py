@@ -23,6 +23,7 @@ __all__ = [
     "OpDefConfig",
     "OpDefDependency",
     "OpDefExec",
+    "OpDefManifest",
     "OpDefNotFound",
     "OpDefSummary",
     "OpRef",
@@ -249,6 +250,17 @@ class OpDefSummary:
         return self._data.get("filename")
 
 
+class OpDefManifest:
+    def __init__(self, data: Data):
+        self._data = data
+
+    def as_json(self) -> Data:
+        return self._data
+
+    def get_fingerprint_size(self) -> int | float | str | None:
+        return self._data.get("fingerprint-size")
+
+
 class OpDef:
     def __init__(self, name: str, data: Data, src: str | None = None):
         self.name = name
@@ -318,6 +330,12 @@ class OpDef:
             val = {}
         return OpDefSummary(val)
 
+    def get_manifest(self) -> OpDefManifest:
+        val = self._data.get("manifest")
+        if val is None:
+            val = {}
+        return OpDefManifest(val)
+
     def get_progress(self) -> OpDefProgress:
         val = self._data.get("progress", {})
         if isinstance(val, str) or isinstance(val, list):
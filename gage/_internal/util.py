@@ -146,6 +146,59 @@ def _psutil_pid_exists(pid: int):
     return psutil.pid_exists(pid)
 
 
+# Process snapshots are refreshed when older than this (seconds)
+PROCESS_SNAPSHOT_MAX_AGE = 5.0
+
+__process_snapshot: tuple[float, dict[int, float]] | None = None
+__process_snapshot_lock = threading.Lock()
+
+
+def process_snapshot(min_time: float = 0.0) -> dict[int, float]:
+    """Returns a dict of running process IDs to process create times.
+
+    The snapshot is shared across calls. It's refreshed when it's
+    older than `PROCESS_SNAPSHOT_MAX_AGE` seconds or when it's taken
+    before `min_time`, which is used to ensure that a snapshot
+    includes processes created at or before that time.
+    """
+    with __process_snapshot_lock:
+        now = time.time()
+        snapshot = globals()["__process_snapshot"]
+        if (
+            snapshot is None
+            or snapshot[0] < min_time
+            or now - snapshot[0] > PROCESS_SNAPSHOT_MAX_AGE
+        ):
+            snapshot = now, _process_create_times()
+            globals()["__process_snapshot"] = snapshot
+        return snapshot[1]
+
+
+def clear_process_snapshot():
+    globals()["__process_snapshot"] = None
+
+
+def _process_create_times():
+    import psutil
+
+    create_times: dict[int, float] = {}
+    for proc in psutil.process_iter(["create_time"]):
+        create_time = proc.info.get("create_time")
+        if create_time is not None:
+            create_times[proc.pid] = create_time
+    return create_times
+
+
+def process_create_time(pid: int) -> float | None:
+    """Returns the create time for a process or None if not running."""
+    import psutil
+
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
 def free_port(start: Optional[int] = None) -> int:
     import random
     import socket
@@ -1263,3 +1316,50 @@ def kebab_to_camel(s: str):
             if part
         ]
     )
+
+
+DEFAULT_IO_WORKERS = 8
+
+U = TypeVar("U")
+
+
+def io_workers():
+    """Returns the number of threads used for concurrent file I/O.
+
+    Set `GAGE_IO_WORKERS` to change the default. A value of 1 disables
+    concurrent I/O.
+    """
+    workers = try_env("GAGE_IO_WORKERS", int)
+    return DEFAULT_IO_WORKERS if workers is None else max(1, workers)
+
+
+def hash_workers():
+    """Returns the number of threads used to compute file digests.
+
+    Set `GAGE_HASH_WORKERS` to change the default, which is the number
+    of CPUs up to `DEFAULT_IO_WORKERS`. A value of 1 disables
+    concurrent hashing.
+    """
+    workers = try_env("GAGE_HASH_WORKERS", int)
+    if workers is None:
+        return min(DEFAULT_IO_WORKERS, os.cpu_count() or 1)
+    return max(1, workers)
+
+
+def io_map(f: Callable[[T], U], items: list[T], workers: int | None = None) -> list[U]:
+    """Applies `f` to items using a thread pool.
+
+    Use for functions that are I/O bound. Results are returned in the
+    order of `items`. If `f` raises an exception, the exception is
+    raised by `io_map`.
+
+    `workers` is the maximum number of threads to use. By default
+    `io_workers()` is used.
+    """
+    workers = min(io_workers() if workers is None else workers, len(items))
+    if workers <= 1:
+        return [f(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(f, items))
@@ -4,15 +4,24 @@ from typing import *
 
 from .types import *
 
-import functools
+import heapq
 import logging
 import os
 
+from . import object_store
+from . import run_index
+from . import run_latest
+from . import run_meta
+from . import run_move
+from . import util
+
+from .run_attr import prefetch_run_attrs
 from .run_attr import run_attr
 
 from .run_move import ACTIVE_CONTAINER
 from .run_move import log_run_move
 from .run_move import run_container
+from .run_move import run_containers
 
 from .run_util import run_for_meta_dir
 
@@ -24,13 +33,16 @@ from .gagefile import GageFileLoadError
 from .gagefile import gagefile_for_dir
 
 __all__ = [
+    "container_run_counts",
     "delete_run",
     "delete_runs",
+    "latest_run",
     "list_runs",
     "move_run",
     "move_runs",
     "set_runs_dir",
     "runs_dir",
+    "sort_runs",
 ]
 
 log = logging.getLogger(__name__)
@@ -97,74 +109,185 @@ def list_runs(
     filter: RunFilter | None = None,
     sort: list[str] | None = None,
     container: str = ACTIVE,
+    limit: int | None = None,
+    prefetch: Sequence[str] | None = None,
+    read_only: bool = False,
 ):
+    """Returns runs in a runs directory.
+
+    Run attributes in `prefetch` are read concurrently as runs are
+    loaded. By default, attributes used to sort runs are read. Other
+    attributes are read as they're needed.
+
+    If `read_only` is True, runs are listed without creating or
+    updating the run index or container index in `root`. Use when
+    listing runs in a directory that Gage doesn't own, e.g. a copy
+    source.
+    """
     root = root or runs_dir()
     log.debug("Getting runs from %s", root)
     filter = filter or _all_runs_filter
-    runs_iter = _iter_runs(root, container)
+    if prefetch is None:
+        prefetch = [attr.lstrip("-") for attr in sort or []]
+    runs_iter = _iter_runs(root, container, prefetch, read_only)
     runs = [run for run in runs_iter if filter(run)] if filter else list(runs_iter)
     if not sort:
-        return runs
-    return sorted(runs, key=_run_sort_key(sort))
+        return runs[:limit] if limit is not None else runs
+    return sort_runs(runs, sort, limit)
+
+
+def container_run_counts(root: str | None = None):
+    """Returns a dict of containers to run counts.
+
+    Containers without runs are not included.
+    """
+    return run_move.container_run_counts(root or runs_dir())
+
+
+def latest_run(root: str | None = None):
+    """Returns the latest active run or None if there are no runs.
+
+    The latest run is the first run sorted by '-timestamp'. Uses the
+    latest run pointer in the runs directory when it's valid. Otherwise
+    lists runs to find the latest run and writes the pointer.
+    """
+    root = root or runs_dir()
+    run = _pointer_latest_run(root)
+    if run:
+        return run
+    runs = list_runs(root, sort=["-timestamp"], limit=1)
+    if not runs:
+        run_latest.delete_latest_run(root)
+        return None
+    run_latest.write_latest_run(root, runs[0])
+    return runs[0]
+
+
+def _pointer_latest_run(root: str):
+    pointer = run_latest.read_latest_run(root)
+    if not pointer:
+        return None
+    timestamp, run_id = pointer
+    for name in (f"{run_id}.meta.zip", f"{run_id}.meta"):
+        run = run_for_meta_dir(os.path.join(root, name))
+        if run:
+            break
+    else:
+        log.debug("Latest run %s in %s does not exist", run_id, root)
+        return None
+    if run_container(run) != ACTIVE:
+        log.debug("Latest run %s in %s is not active", run_id, root)
+        return None
+    if run_latest.run_timestamp_us(run) != timestamp:
+        log.debug("Latest run %s in %s has a different timestamp", run_id, root)
+        return None
+    return run
 
 
 def _all_runs_filter(run: Run):
     return True
 
 
-def _iter_runs(root: str, container: str):
+def _iter_runs(root: str, container: str, prefetch: Sequence[str], read_only: bool):
     try:
         names = os.listdir(root)
     except OSError:
-        pass
+        return
+    containers = run_containers(root, names, update_index=not read_only)
+    if container != ACTIVE:
+        # Only load runs in the container
+        yield from _load_meta_dir_runs(
+            root, _container_meta_names(names, containers, container), prefetch
+        )
+        return
+    indexed = None if read_only else run_index.indexed_runs(root, names, prefetch)
+    if indexed is not None:
+        for run, run_container in indexed:
+            if run_container == container:
+                yield run
     else:
-        for name in names:
-            if not _is_meta_name(name):
-                continue
-            meta_dir = os.path.join(root, name)
-            run = run_for_meta_dir(meta_dir)
-            if not run:
-                continue
-            if _match_run_container(run, container):
+        for run in _load_meta_dir_runs(root, names, prefetch):
+            if containers.get(run.id, ACTIVE) == container:
                 yield run
 
 
+def _container_meta_names(names: list[str], containers: dict[str, str], container: str):
+    return [
+        name
+        for name in names
+        if _is_meta_name(name)
+        and containers.get(run_meta.meta_run_id(name)) == container
+    ]
+
+
+def _load_meta_dir_runs(root: str, names: list[str], prefetch: Sequence[str]):
+    meta_dirs = [os.path.join(root, name) for name in names if _is_meta_name(name)]
+
+    def load(meta_dir: str):
+        return _load_run(meta_dir, prefetch)
+
+    return [run for run in util.io_map(load, meta_dirs) if run]
+
+
 def _is_meta_name(name: str):
     return name.endswith(".meta") or name.endswith(".meta.zip")
 
 
-def _match_run_container(run: Run, container: str):
-    return run_container(run) == container
+def _load_run(meta_dir: str, prefetch: Sequence[str]):
+    run = run_for_meta_dir(meta_dir)
+    if not run:
+        return None
+    prefetch_run_attrs(run, prefetch)
+    return run
+
+
+def sort_runs(runs: list[Run], sort: list[str], limit: int | None = None):
+    """Returns runs sorted by a list of run attributes.
+
+    Each item in `sort` is the name of a run attribute. Prefix a name
+    with '-' to sort in descending order. Runs without an attribute
+    value are sorted before runs with a value in ascending order and
+    after runs with a value in descending order.
+
+    If `limit` is specified, returns at most `limit` runs. This is more
+    efficient than sorting all runs when `limit` is small.
+    """
+    key = _run_sort_key(sort)
+    if limit is not None and limit < len(runs):
+        return heapq.nsmallest(limit, runs, key=key)
+    return sorted(runs, key=key)
 
 
 def _run_sort_key(sort: list[str]):
-    def cmp(a: Run, b: Run):
-        return _run_cmp(a, b, sort)
+    attrs = [
+        (attr[1:], True) if attr.startswith("-") else (attr, False) for attr in sort
+    ]
 
-    return functools.cmp_to_key(cmp)
+    def key(run: Run):
+        return tuple([_attr_sort_key(run, attr, desc) for attr, desc in attrs])
 
+    return key
 
-def _run_cmp(a: Run, b: Run, sort: list[str]):
-    for attr in sort:
-        attr_cmp = _run_attr_cmp(a, b, attr)
-        if attr_cmp != 0:
-            return attr_cmp
-    return 0
 
+def _attr_sort_key(run: Run, attr: str, desc: bool):
+    val = run_attr(run, attr, None)
+    key = (0,) if val is None else (1, val)
+    return _Descending(key) if desc else key
 
-def _run_attr_cmp(a: Run, b: Run, attr: str):
-    if attr.startswith("-"):
-        attr = attr[1:]
-        rev = -1
-    else:
-        rev = 1
-    x_val = run_attr(a, attr, None)
-    if x_val is None:
-        return -rev
-    y_val = run_attr(b, attr, None)
-    if y_val is None:
-        return rev
-    return rev * ((x_val > y_val) - (x_val < y_val))
+
+class _Descending:
+    """Sort key wrapper that reverses the order of the wrapped key."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: Any):
+        self.key = key
+
+    def __lt__(self, other: "_Descending"):
+        return other.key < self.key
+
+    def __eq__(self, other: object):
+        return isinstance(other, _Descending) and other.key == self.key
 
 
 # =================================================================
@@ -180,7 +303,18 @@ def move_runs(runs: list[Run], container: str):
 def move_run(run: Run, container: str):
     if not os.path.exists(run.meta_dir):
         raise FileNotFoundError(run.meta_dir)
+    run_meta.invalidate_meta_zip(run.meta_dir)
     log_run_move(run, container)
+    _update_latest_for_move(run, container)
+
+
+def _update_latest_for_move(run: Run, container: str):
+    if container == ACTIVE:
+        timestamp = run_latest.run_timestamp_us(run)
+        if timestamp is not None:
+            run_latest.update_latest_run(run, timestamp)
+    else:
+        run_latest.clear_latest_run(run)
 
 
 def restore_runs(runs: list[Run]):
@@ -203,9 +337,14 @@ def delete_runs(runs: list[Run]):
 
 
 def delete_run(run: Run):
+    # Read object digests before deleting the run manifest
+    digests = object_store.run_object_digests(run)
+    run_meta.invalidate_meta_zip(run.meta_dir)
+    run_latest.clear_latest_run(run)
     for path in _iter_run_sources_for_delete(run):
         log.debug("Permanently deleting run source: %s", path)
         safe_delete_tree(path)
+    object_store.release_run_objects(os.path.dirname(run.meta_dir), digests)
 
 
 def _iter_run_sources_for_delete(run: Run):